@@ -0,0 +1,73 @@
+import struct
+import timeit
+from collections.abc import Callable
+from typing import Any
+from typing import Dict
+
+from construct import Flag
+from construct import Int64ul
+from construct import Struct
+from settings import settings
+from solders.pubkey import Pubkey
+from utils.bonding_curve import get_bonding_curve_pda
+from utils.data_handler import token_data_from_bonding_curve_token_acc_buffer
+
+NUMBER: int = 20_000
+MINT: Pubkey = Pubkey.from_string("EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v")
+BUFFER: bytes = struct.pack(
+    "<QQQQQQ?",
+    6966180631402821399,
+    1_073_000_000_000_000,
+    30_000_000_000,
+    793_100_000_000_000,
+    0,
+    1_000_000_000_000_000,
+    False,
+) + bytes(32)
+
+
+def construct_decoder(buffer: bytes) -> Dict[str, Any]:
+    # The decoder this module replaced: builds the layout and a Container per call.
+    structure = Struct(
+        "discriminator" / Int64ul,
+        "virtualTokenReserves" / Int64ul,
+        "virtualSolReserves" / Int64ul,
+        "realTokenReserves" / Int64ul,
+        "realSolReserves" / Int64ul,
+        "tokenTotalSupply" / Int64ul,
+        "complete" / Flag,
+    )
+    return dict(structure.parse(buffer))
+
+
+def measure(name: str, func: Callable[[], Any], number: int = NUMBER) -> float:
+    seconds: float = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{name:<32} {seconds * 1e6:10.2f} us/call")
+    return seconds
+
+
+def main() -> None:
+    expected: Dict[str, Any] = token_data_from_bonding_curve_token_acc_buffer(BUFFER)
+    assert all(
+        construct_decoder(BUFFER)[key] == value for key, value in expected.items()
+    )
+
+    before = measure("decode (construct)", lambda: construct_decoder(BUFFER))
+    after = measure(
+        "decode (precompiled struct)",
+        lambda: token_data_from_bonding_curve_token_acc_buffer(BUFFER),
+    )
+    print(f"{'decode speedup':<32} {before / after:10.1f}x")
+
+    program_id: Pubkey = settings.pumpfun_program_id
+    uncached = measure(
+        "pda (find_program_address)",
+        lambda: get_bonding_curve_pda.__wrapped__(MINT, program_id),
+        number=2_000,
+    )
+    cached = measure("pda (memoized)", lambda: get_bonding_curve_pda(MINT, program_id))
+    print(f"{'pda speedup':<32} {uncached / cached:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
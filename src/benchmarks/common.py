@@ -0,0 +1,91 @@
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextlib import ExitStack
+from pathlib import Path
+from typing import IO
+from typing import List
+from typing import Optional
+from typing import Union
+
+SRC_DIR: Path = Path(__file__).parent.parent
+READY_TIMEOUT: float = 30.0
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return math.nan
+    ordered: List[float] = sorted(values)
+    rank: int = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float) -> None:
+    deadline: float = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise ValueError(f"Process exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise ValueError(f"Nothing listening on port {port} after {timeout}s")
+
+
+@contextmanager
+def run_process(
+    command: List[str],
+    port: int,
+    log_path: Optional[Path] = None,
+    timeout: float = READY_TIMEOUT,
+) -> Iterator[subprocess.Popen]:
+    with ExitStack() as stack:
+        output: Union[int, IO[bytes]] = subprocess.DEVNULL
+        if log_path is not None:
+            output = stack.enter_context(open(log_path, "wb"))
+        process: subprocess.Popen = subprocess.Popen(
+            [sys.executable, *command, "--port", str(port)],
+            cwd=SRC_DIR,
+            stdout=output,
+            stderr=subprocess.STDOUT if log_path is not None else None,
+        )
+        try:
+            wait_for_port(port, process, timeout)
+            yield process
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+@contextmanager
+def run_module(
+    module: str,
+    port: int,
+    arguments: List[str],
+    timeout: float = READY_TIMEOUT,
+) -> Iterator[subprocess.Popen]:
+    with run_process(["-m", module, *arguments], port, timeout=timeout) as process:
+        yield process
+
+
+def point_settings_at_stand_in(port: int, work_dir: Path) -> None:
+    # Must run before anything imports settings.
+    os.environ["SOLANA_RPC"] = f"http://127.0.0.1:{port}/"
+    os.environ["JUPITER_PRICE_URL"] = f"http://127.0.0.1:{port}/price"
+    os.environ["TX_CACHE_PATH"] = str(work_dir / "transactions.sqlite3")
+    os.environ["LOG_DIR"] = str(work_dir / "logs")
@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import aiohttp
+from benchmarks.common import free_port
+from benchmarks.common import percentile
+from benchmarks.common import point_settings_at_stand_in
+from benchmarks.common import run_module
+from benchmarks.common import run_process
+from benchmarks.stand_in import add_stand_in_arguments
+from benchmarks.stand_in import stand_in_arguments
+from benchmarks.stand_in import synthetic_mints
+from benchmarks.stand_in import synthetic_wallet
+from benchmarks.suite import PRICE_TOKENS
+from benchmarks.suite import PRICE_TOOLS
+from benchmarks.suite import WALLET_TOOLS
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from prometheus_client.parser import text_string_to_metric_families
+
+DEFAULT_MIX: str = (
+    "calculate-total-profit=3,is-bot-trading=2,get-token-price=2,"
+    "get-purchased-tokens=1,calculate-win-rate=1,get-token-prices=1,analyze-wallets=1"
+)
+DEFAULT_SIZES: List[int] = [100, 1000]
+LOOP_LAG_METRIC: str = "event_loop_lag_seconds"
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for item in text.split(","):
+        tool, _, weight = item.partition("=")
+        if tool not in WALLET_TOOLS and tool not in PRICE_TOOLS:
+            raise ValueError(f"Unknown tool in mix: {tool}")
+        mix[tool] = float(weight or 1)
+    return mix
+
+
+class LoadStats:
+    def __init__(self) -> None:
+        self.connect_latencies: List[float] = []
+        self.session_latencies: List[float] = []
+        self.tool_latencies: Dict[str, List[float]] = {}
+        self.tool_errors: Dict[str, int] = {}
+        self.failed_sessions: int = 0
+
+    def record_call(self, tool: str, seconds: float, failed: bool) -> None:
+        self.tool_latencies.setdefault(tool, []).append(seconds)
+        if failed:
+            self.tool_errors[tool] = self.tool_errors.get(tool, 0) + 1
+
+
+async def run_session(
+    url: str,
+    calls: int,
+    mix: Dict[str, float],
+    rng: random.Random,
+    sizes: List[int],
+    stats: LoadStats,
+) -> None:
+    mints: List[str] = synthetic_mints()
+    tools: List[str] = list(mix)
+    weights: List[float] = list(mix.values())
+    started_at: float = time.perf_counter()
+    try:
+        async with sse_client(url) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                stats.connect_latencies.append(time.perf_counter() - started_at)
+                for _ in range(calls):
+                    tool: str = rng.choices(tools, weights)[0]
+                    arguments: Dict[str, Any]
+                    if tool in WALLET_TOOLS:
+                        arguments = WALLET_TOOLS[tool](
+                            synthetic_wallet(rng.choice(sizes)), rng.choice(mints)
+                        )
+                    else:
+                        arguments = PRICE_TOOLS[tool](rng.sample(mints, PRICE_TOKENS))
+                    call_started_at: float = time.perf_counter()
+                    result = await session.call_tool(tool, arguments)
+                    stats.record_call(
+                        tool, time.perf_counter() - call_started_at, result.isError
+                    )
+    except Exception:
+        stats.failed_sessions += 1
+        return
+    stats.session_latencies.append(time.perf_counter() - started_at)
+
+
+async def scrape_loop_lag(session: aiohttp.ClientSession, url: str) -> Dict[str, float]:
+    async with session.get(url) as response:
+        text: str = await response.text()
+    samples: Dict[str, float] = {}
+    for family in text_string_to_metric_families(text):
+        if family.name != LOOP_LAG_METRIC:
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_bucket"):
+                samples[sample.labels["le"]] = sample.value
+            elif sample.name.endswith(("_sum", "_count")):
+                samples[sample.name.rsplit("_", 1)[1]] = sample.value
+    return samples
+
+
+def loop_lag_summary(
+    before: Dict[str, float], after: Dict[str, float]
+) -> Dict[str, Optional[float]]:
+    # Bucket counts are cumulative, so percentiles resolve to a bucket's upper bound.
+    count: float = after.get("count", 0) - before.get("count", 0)
+    if count <= 0:
+        return {"samples": 0, "mean": None, "p50": None, "p99": None}
+    buckets: List[Tuple[float, float]] = sorted(
+        (float(le), after[le] - before.get(le, 0))
+        for le in after
+        if le not in ("sum", "count")
+    )
+
+    def bucket_percentile(q: float) -> float:
+        return next(le for le, seen in buckets if seen >= count * q / 100)
+
+    return {
+        "samples": count,
+        "mean": (after["sum"] - before.get("sum", 0)) / count,
+        "p50": bucket_percentile(50),
+        "p99": bucket_percentile(99),
+    }
+
+
+def milliseconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.1f}"
+
+
+def print_report(
+    stats: LoadStats,
+    sessions: int,
+    elapsed: float,
+    loop_lag: Dict[str, Optional[float]],
+) -> None:
+    completed: int = len(stats.session_latencies)
+    print(
+        f"sessions: {completed}/{sessions} completed, {stats.failed_sessions} failed "
+        f"in {elapsed:.1f}s ({completed / elapsed:.2f} sessions/s)"
+    )
+    print(
+        f"connect+initialize ms: p50 {milliseconds(percentile(stats.connect_latencies, 50))}"
+        f" p99 {milliseconds(percentile(stats.connect_latencies, 99))}"
+    )
+    print(
+        f"{'tool':<32} {'calls':>6} {'errors':>6} {'p50 ms':>9} {'p90 ms':>9} "
+        f"{'p99 ms':>9} {'max ms':>9}"
+    )
+    every_call: List[float] = []
+    for tool, latencies in sorted(stats.tool_latencies.items()):
+        every_call += latencies
+        print(
+            f"{tool:<32} {len(latencies):>6} {stats.tool_errors.get(tool, 0):>6} "
+            f"{milliseconds(percentile(latencies, 50)):>9} "
+            f"{milliseconds(percentile(latencies, 90)):>9} "
+            f"{milliseconds(percentile(latencies, 99)):>9} "
+            f"{milliseconds(max(latencies)):>9}"
+        )
+    print(
+        f"{'all':<32} {len(every_call):>6} {sum(stats.tool_errors.values()):>6} "
+        f"{milliseconds(percentile(every_call, 50)):>9} "
+        f"{milliseconds(percentile(every_call, 90)):>9} "
+        f"{milliseconds(percentile(every_call, 99)):>9} "
+        f"{milliseconds(max(every_call, default=None)):>9}"
+    )
+    print(
+        f"server event loop lag over {loop_lag['samples']:.0f} samples: "
+        f"mean {milliseconds(loop_lag['mean'])} ms, "
+        f"p50 <= {milliseconds(loop_lag['p50'])} ms, "
+        f"p99 <= {milliseconds(loop_lag['p99'])} ms"
+    )
+
+
+async def run_load(args: argparse.Namespace, server_port: int) -> None:
+    base_url: str = f"http://127.0.0.1:{server_port}"
+    mix: Dict[str, float] = parse_mix(args.mix)
+    rng: random.Random = random.Random(args.seed)
+    stats: LoadStats = LoadStats()
+    semaphore: asyncio.Semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited_session() -> None:
+        async with semaphore:
+            await run_session(
+                f"{base_url}/sse",
+                args.calls_per_session,
+                mix,
+                random.Random(rng.random()),
+                args.sizes,
+                stats,
+            )
+
+    async with aiohttp.ClientSession() as http:
+        before: Dict[str, float] = await scrape_loop_lag(http, f"{base_url}/metrics")
+        started_at: float = time.perf_counter()
+        await asyncio.gather(*(limited_session() for _ in range(args.sessions)))
+        elapsed: float = time.perf_counter() - started_at
+        after: Dict[str, float] = await scrape_loop_lag(http, f"{base_url}/metrics")
+    print_report(stats, args.sessions, elapsed, loop_lag_summary(before, after))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Open concurrent MCP SSE sessions against a local server."
+    )
+    add_stand_in_arguments(parser)
+    parser.set_defaults(sizes=DEFAULT_SIZES)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--calls-per-session", type=int, default=5)
+    parser.add_argument(
+        "--mix", default=DEFAULT_MIX, help="Comma separated tool=weight pairs"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stand_in_port: int = free_port()
+    server_port: int = free_port()
+    with tempfile.TemporaryDirectory() as work_dir:
+        point_settings_at_stand_in(stand_in_port, Path(work_dir))
+        log_path: Path = Path(work_dir) / "server.out"
+        with run_module("benchmarks.stand_in", stand_in_port, stand_in_arguments(args)):
+            with run_process(
+                ["server.py", "--host", "127.0.0.1"], server_port, log_path
+            ):
+                asyncio.run(run_load(args, server_port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from aiohttp import web
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+
+FIXTURE_DIR: Path = Path(__file__).parent / "fixtures"
+TRANSACTION_FIXTURE: Path = FIXTURE_DIR / "transactions" / "synthetic_pump_buy.json"
+ACCOUNT_FIXTURE: Path = FIXTURE_DIR / "accounts" / "bonding_curve.json"
+PRICE_FIXTURE: Path = FIXTURE_DIR / "prices" / "jupiter.json"
+DEFAULT_SIZES: Tuple[int, ...] = (100, 10_000, 100_000)
+MINT_POOL_SIZE: int = 50
+FIRST_SLOT: int = 300_000_000
+# Spread each wallet's signatures over most of the week the tools look back on.
+HISTORY_SPAN: int = 6 * 24 * 60 * 60
+MAX_SIGNATURE_SPACING: int = 60
+FAILED_EVERY: int = 50
+NON_TRADE_EVERY: int = 10
+COMPLETE_FLAG_OFFSET: int = 48
+
+
+def synthetic_pubkey(seed: str) -> str:
+    return str(Pubkey.from_bytes(hashlib.sha256(seed.encode("utf-8")).digest()))
+
+
+def synthetic_wallet(size: int) -> str:
+    return synthetic_pubkey(f"benchmark-wallet-{size}")
+
+
+def synthetic_mints(count: int = MINT_POOL_SIZE) -> List[str]:
+    return [synthetic_pubkey(f"benchmark-mint-{i}") for i in range(count)]
+
+
+def signature_for(size: int, index: int) -> str:
+    return f"bench{size}x{index}"
+
+
+def parse_signature(signature: str) -> Optional[Tuple[int, int]]:
+    if not signature.startswith("bench") or "x" not in signature:
+        return None
+    size, index = signature[len("bench") :].split("x", 1)
+    return int(size), int(index)
+
+
+class StandIn:
+    def __init__(
+        self,
+        sizes: List[int],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        self.sizes = {synthetic_wallet(size): size for size in sizes}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.started_at: int = int(time.time())
+        self.mints: List[str] = synthetic_mints()
+        self.requests: Dict[str, int] = {}
+
+        transaction: Dict[str, Any] = json.loads(TRANSACTION_FIXTURE.read_text())
+        self.fixture_wallet: str = transaction["wallet"]
+        self.transaction_fixture: Dict[str, Dict[str, Any]] = {
+            "json": transaction["json"],
+            "base64": transaction["base64"],
+        }
+        self.account_fixture: Dict[str, Any] = json.loads(ACCOUNT_FIXTURE.read_text())[
+            "value"
+        ]
+        self.price_fixture: Dict[str, Any] = json.loads(PRICE_FIXTURE.read_text())[
+            "response"
+        ]
+        self._transactions: Dict[Tuple[str, str], Any] = {}
+
+    def spacing(self, size: int) -> int:
+        return max(1, min(MAX_SIGNATURE_SPACING, HISTORY_SPAN // size))
+
+    def signature_info(self, size: int, index: int) -> Dict[str, Any]:
+        failed: bool = index % FAILED_EVERY == FAILED_EVERY - 1
+        return {
+            "signature": signature_for(size, index),
+            "slot": FIRST_SLOT - index,
+            "err": {"InstructionError": [0, "Custom"]} if failed else None,
+            "memo": None,
+            "blockTime": self.started_at - index * self.spacing(size),
+            "confirmationStatus": "finalized",
+        }
+
+    def get_signatures_for_address(self, params: List[Any]) -> List[Dict[str, Any]]:
+        size: Optional[int] = self.sizes.get(params[0])
+        if size is None:
+            return []
+        options: Dict[str, Any] = params[1] if len(params) > 1 else {}
+        start: int = 0
+        end: int = size
+        before: Optional[Tuple[int, int]] = parse_signature(options.get("before") or "")
+        if before is not None:
+            start = before[1] + 1
+        until: Optional[Tuple[int, int]] = parse_signature(options.get("until") or "")
+        if until is not None:
+            end = min(end, until[1])
+        end = min(end, start + int(options.get("limit", 1000)))
+        return [self.signature_info(size, index) for index in range(start, end)]
+
+    def transaction_for_wallet(self, wallet: str, encoding: str) -> Any:
+        # Swap the fixture's fee payer for the synthetic wallet, once per wallet.
+        key: Tuple[str, str] = (wallet, encoding)
+        transaction: Any = self._transactions.get(key)
+        if transaction is not None:
+            return transaction
+        if encoding == "base64":
+            encoded, _ = self.transaction_fixture["base64"]["transaction"]
+            fixture = VersionedTransaction.from_bytes(base64.b64decode(encoded))
+            message = fixture.message
+            account_keys: List[Pubkey] = [
+                Pubkey.from_string(wallet) if str(key) == self.fixture_wallet else key
+                for key in message.account_keys
+            ]
+            rebuilt = VersionedTransaction.populate(
+                MessageV0(
+                    message.header,
+                    account_keys,
+                    message.recent_blockhash,
+                    message.instructions,
+                    message.address_table_lookups,
+                ),
+                fixture.signatures,
+            )
+            transaction = [base64.b64encode(bytes(rebuilt)).decode(), "base64"]
+        else:
+            transaction = json.loads(
+                json.dumps(self.transaction_fixture["json"]["transaction"]).replace(
+                    self.fixture_wallet, wallet
+                )
+            )
+        self._transactions[key] = transaction
+        return transaction
+
+    def meta_for(self, wallet: str, size: int, index: int) -> Dict[str, Any]:
+        template: Dict[str, Any] = self.transaction_fixture["json"]["meta"]
+        fee: int = template["fee"]
+        cost: int = 10_000_000 + (index * 7919) % 500_000_000
+        tokens: int = 1_000_000_000 + (index * 104729) % 50_000_000_000
+        pre_lamports: int = template["preBalances"][0]
+        pre_tokens: int
+        post_tokens: int
+        post_lamports: int
+        if index % NON_TRADE_EVERY == 0:
+            pre_tokens, post_tokens = tokens, tokens
+            post_lamports = pre_lamports - fee
+        elif index % 2:
+            # Sells return between 0.5x and 1.7x of a typical buy.
+            pre_tokens, post_tokens = tokens, 0
+            post_lamports = pre_lamports + cost * (5 + index % 13) // 10 - fee
+        else:
+            pre_tokens, post_tokens = 0, tokens
+            post_lamports = pre_lamports - cost - fee
+        mint: str = self.mints[(index // 2) % len(self.mints)]
+
+        def token_balance(amount: int) -> Dict[str, Any]:
+            balance: Dict[str, Any] = dict(template["preTokenBalances"][0])
+            balance["mint"] = mint
+            balance["owner"] = wallet
+            balance["uiTokenAmount"] = {
+                "amount": str(amount),
+                "decimals": 6,
+                "uiAmount": amount / 10**6,
+                "uiAmountString": str(amount / 10**6),
+            }
+            return balance
+
+        meta: Dict[str, Any] = dict(template)
+        meta["preBalances"] = [pre_lamports, *template["preBalances"][1:]]
+        meta["postBalances"] = [post_lamports, *template["preBalances"][1:]]
+        meta["preTokenBalances"] = [token_balance(pre_tokens)]
+        meta["postTokenBalances"] = [token_balance(post_tokens)]
+        return meta
+
+    def get_transaction(self, params: List[Any]) -> Optional[Dict[str, Any]]:
+        parsed: Optional[Tuple[int, int]] = parse_signature(params[0])
+        if parsed is None:
+            return None
+        size, index = parsed
+        wallet: str = synthetic_wallet(size)
+        if wallet not in self.sizes or index >= size:
+            return None
+        options: Dict[str, Any] = params[1] if len(params) > 1 else {}
+        info: Dict[str, Any] = self.signature_info(size, index)
+        return {
+            "blockTime": info["blockTime"],
+            "slot": info["slot"],
+            "version": 0,
+            "meta": self.meta_for(wallet, size, index),
+            "transaction": self.transaction_for_wallet(
+                wallet, options.get("encoding", "json")
+            ),
+        }
+
+    def account_for(self, pubkey: str) -> Dict[str, Any]:
+        # Roughly half the curves are complete, so both price paths get exercised.
+        data: bytearray = bytearray(base64.b64decode(self.account_fixture["data"][0]))
+        data[COMPLETE_FLAG_OFFSET] = (
+            hashlib.sha256(pubkey.encode("utf-8")).digest()[0] % 2
+        )
+        account: Dict[str, Any] = dict(self.account_fixture)
+        account["data"] = [base64.b64encode(bytes(data)).decode(), "base64"]
+        return account
+
+    def rpc_result(self, method: str, params: List[Any]) -> Any:
+        if method == "getSignaturesForAddress":
+            return self.get_signatures_for_address(params)
+        if method == "getTransaction":
+            return self.get_transaction(params)
+        if method == "getAccountInfo":
+            return {
+                "context": {"slot": FIRST_SLOT},
+                "value": self.account_for(params[0]),
+            }
+        if method == "getMultipleAccounts":
+            return {
+                "context": {"slot": FIRST_SLOT},
+                "value": [self.account_for(pubkey) for pubkey in params[0]],
+            }
+        raise ValueError(f"Method not found: {method}")
+
+    def handle_rpc_call(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        method: str = call.get("method", "")
+        self.requests[method] = self.requests.get(method, 0) + 1
+        try:
+            result: Any = self.rpc_result(method, call.get("params") or [])
+        except ValueError as e:
+            return {
+                "jsonrpc": "2.0",
+                "id": call.get("id"),
+                "error": {"code": -32601, "message": str(e)},
+            }
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+
+    async def inject_faults(self) -> Optional[web.Response]:
+        delay: float = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        roll: float = random.random()
+        if roll < self.rate_limit_rate:
+            self.requests["429"] = self.requests.get("429", 0) + 1
+            headers: Dict[str, str] = {}
+            if self.retry_after is not None:
+                headers["Retry-After"] = str(self.retry_after)
+            return web.Response(status=429, text="Too Many Requests", headers=headers)
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.requests["500"] = self.requests.get("500", 0) + 1
+            return web.Response(status=500, text="Internal Server Error")
+        return None
+
+    async def handle_rpc(self, request: web.Request) -> web.Response:
+        fault: Optional[web.Response] = await self.inject_faults()
+        if fault is not None:
+            return fault
+        body: Any = await request.json()
+        if isinstance(body, list):
+            return web.json_response([self.handle_rpc_call(call) for call in body])
+        return web.json_response(self.handle_rpc_call(body))
+
+    async def handle_price(self, request: web.Request) -> web.Response:
+        fault: Optional[web.Response] = await self.inject_faults()
+        if fault is not None:
+            return fault
+        self.requests["price"] = self.requests.get("price", 0) + 1
+        template: Dict[str, Any] = next(iter(self.price_fixture["data"].values()))
+        data: Dict[str, Any] = {}
+        for mint in request.query.get("ids", "").split(","):
+            if not mint:
+                continue
+            price: str = self.price_fixture["data"].get(mint, {}).get("price") or str(
+                int.from_bytes(hashlib.sha256(mint.encode("utf-8")).digest()[:2]) / 1e6
+            )
+            data[mint] = {**template, "id": mint, "price": price}
+        return web.json_response({**self.price_fixture, "data": data})
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.requests)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/", self.handle_rpc)
+        app.router.add_get("/price", self.handle_price)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+
+def add_stand_in_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds per request"
+    )
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 500s")
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=0.0, help="Share of 429s"
+    )
+    parser.add_argument("--retry-after", type=float, help="Retry-After sent with 429s")
+
+
+def stand_in_arguments(args: argparse.Namespace) -> List[str]:
+    arguments: List[str] = ["--sizes", *(str(size) for size in args.sizes)]
+    arguments += ["--latency", str(args.latency), "--jitter", str(args.jitter)]
+    arguments += ["--error-rate", str(args.error_rate)]
+    arguments += ["--rate-limit-rate", str(args.rate_limit_rate)]
+    if args.retry_after is not None:
+        arguments += ["--retry-after", str(args.retry_after)]
+    return arguments
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve Solana RPC and Jupiter price responses from fixtures."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18899)
+    add_stand_in_arguments(parser)
+    args = parser.parse_args()
+
+    stand_in = StandIn(
+        args.sizes,
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        args.rate_limit_rate,
+        args.retry_after,
+    )
+    for size in args.sizes:
+        print(f"wallet {synthetic_wallet(size)}: {size} signatures", flush=True)
+    web.run_app(stand_in.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
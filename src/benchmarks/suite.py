@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from benchmarks.common import free_port
+from benchmarks.common import percentile
+from benchmarks.common import point_settings_at_stand_in
+from benchmarks.common import run_module
+from benchmarks.stand_in import add_stand_in_arguments
+from benchmarks.stand_in import stand_in_arguments
+from benchmarks.stand_in import synthetic_mints
+from benchmarks.stand_in import synthetic_wallet
+
+PRICE_TOKENS: int = 20
+WALLET_TOOLS: Dict[str, Callable[[str, str], Dict[str, Any]]] = {
+    "calculate-total-profit": lambda wallet, mint: {"wallet_address": wallet},
+    "get-purchased-tokens": lambda wallet, mint: {"wallet_address": wallet},
+    "calculate-profit-per-token": lambda wallet, mint: {
+        "wallet_address": wallet,
+        "token": mint,
+    },
+    "calculate-profit-for-each-token": lambda wallet, mint: {"wallet_address": wallet},
+    "calculate-win-rate": lambda wallet, mint: {"wallet_address": wallet},
+    "is-bot-trading": lambda wallet, mint: {"wallet_address": wallet},
+    "analyze-wallets": lambda wallet, mint: {"wallet_addresses": [wallet]},
+}
+PRICE_TOOLS: Dict[str, Callable[[List[str]], Dict[str, Any]]] = {
+    "get-token-price": lambda mints: {"token": mints[0]},
+    "get-token-prices": lambda mints: {"tokens": mints},
+}
+
+
+def reset_caches() -> None:
+    from utils.ledger import clear_wallet_ledgers
+    from utils.result_cache import result_cache
+    from utils.tools import price_service
+    from utils.tx_cache import get_transaction_cache
+
+    clear_wallet_ledgers()
+    result_cache.clear()
+    price_service.clear()
+    cache = get_transaction_cache()
+    if cache is not None:
+        cache.clear()
+
+
+async def measure(
+    tool: str,
+    arguments: Dict[str, Any],
+    signatures: Optional[int],
+    iterations: int,
+    cold: bool,
+    trace_memory: bool,
+) -> Dict[str, Any]:
+    from server import call_tool
+
+    latencies: List[float] = []
+    errors: int = 0
+    for _ in range(iterations):
+        if cold:
+            reset_caches()
+        started_at: float = time.perf_counter()
+        try:
+            await call_tool(tool, arguments)
+        except ValueError:
+            errors += 1
+        latencies.append(time.perf_counter() - started_at)
+
+    peak: Optional[int] = None
+    if trace_memory:
+        # Separate pass: tracemalloc slows the call down too much to time it.
+        if cold:
+            reset_caches()
+        tracemalloc.start()
+        try:
+            await call_tool(tool, arguments)
+        except ValueError:
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    total: float = sum(latencies)
+    return {
+        "tool": tool,
+        "signatures": signatures,
+        "calls": iterations,
+        "errors": errors,
+        "calls_per_second": iterations / total if total else None,
+        "signatures_per_second": (
+            signatures * iterations / total if signatures and total else None
+        ),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_mb": peak / 2**20 if peak is not None else None,
+    }
+
+
+def format_row(row: Dict[str, Any]) -> str:
+    def number(value: Optional[float], width: int, digits: int = 1) -> str:
+        return f"{'-':>{width}}" if value is None else f"{value:>{width}.{digits}f}"
+
+    signatures: str = "-" if row["signatures"] is None else str(row["signatures"])
+    return (
+        f"{row['tool']:<32} {signatures:>8} {row['calls']:>5} {row['errors']:>6} "
+        f"{number(row['calls_per_second'], 9, 2)} "
+        f"{number(row['signatures_per_second'], 10, 0)} "
+        f"{number(row['p50_ms'], 10)} {number(row['p99_ms'], 10)} "
+        f"{number(row['peak_mb'], 8)}"
+    )
+
+
+async def run(args: argparse.Namespace, port: int, work_dir: Path) -> List[Dict]:
+    import lib.log as logger
+    from utils.clients import clients
+    from utils.clients import get_http_session
+
+    logger.Logger.start(name="benchmark", level="WARNING", log_dir=work_dir / "logs")
+    mints: List[str] = synthetic_mints()
+    rows: List[Dict[str, Any]] = []
+    print(
+        f"{'tool':<32} {'sigs':>8} {'calls':>5} {'errors':>6} {'calls/s':>9} "
+        f"{'sigs/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'peak MB':>8}"
+    )
+    try:
+        for size in args.sizes:
+            for tool in args.tools:
+                if tool not in WALLET_TOOLS:
+                    continue
+                row = await measure(
+                    tool,
+                    WALLET_TOOLS[tool](synthetic_wallet(size), mints[0]),
+                    size,
+                    args.iterations,
+                    args.cache == "cold",
+                    not args.no_memory,
+                )
+                rows.append(row)
+                print(format_row(row), flush=True)
+        for tool in args.tools:
+            if tool in PRICE_TOOLS:
+                row = await measure(
+                    tool,
+                    PRICE_TOOLS[tool](mints[:PRICE_TOKENS]),
+                    None,
+                    args.iterations,
+                    args.cache == "cold",
+                    not args.no_memory,
+                )
+                rows.append(row)
+                print(format_row(row), flush=True)
+
+        async with get_http_session().get(f"http://127.0.0.1:{port}/stats") as response:
+            print(f"stand-in requests: {await response.json()}")
+    finally:
+        await clients.close()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark every MCP tool against a local stand-in RPC."
+    )
+    add_stand_in_arguments(parser)
+    parser.add_argument(
+        "--tools",
+        nargs="+",
+        default=[*WALLET_TOOLS, *PRICE_TOOLS],
+        choices=[*WALLET_TOOLS, *PRICE_TOOLS],
+    )
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument(
+        "--cache",
+        choices=["cold", "warm"],
+        default="cold",
+        help="cold clears every cache before each call",
+    )
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak memory")
+    parser.add_argument("--json", type=Path, help="Also write results to this file")
+    args = parser.parse_args()
+
+    port: int = free_port()
+    with tempfile.TemporaryDirectory() as work_dir:
+        point_settings_at_stand_in(port, Path(work_dir))
+        with run_module("benchmarks.stand_in", port, stand_in_arguments(args)):
+            rows: List[Dict] = asyncio.run(run(args, port, Path(work_dir)))
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import lib.log as logger
+from utils.clients import clients
+from utils.clients import get_http_session
+from utils.decoder import decode_base64_transaction
+from utils.decoder import decode_trade
+from utils.decoder import TradeEvent
+from utils.tools import send_rpc_request
+
+FIXTURE_DIR: Path = Path(__file__).parent / "fixtures" / "transactions"
+
+
+async def record(signatures: List[str], wallet_address: Optional[str]) -> None:
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    for signature in signatures:
+        fixture: Dict[str, Any] = {"signature": signature}
+        for encoding in ("json", "base64"):
+            fixture[encoding] = await send_rpc_request(
+                get_http_session(),
+                "getTransaction",
+                [
+                    signature,
+                    {"encoding": encoding, "maxSupportedTransactionVersion": 0},
+                ],
+            )
+            if fixture[encoding] is None:
+                raise ValueError(f"Can not fetch {signature} as {encoding}")
+        fixture["wallet"] = (
+            wallet_address
+            or fixture["json"]["transaction"]["message"]["accountKeys"][0]
+        )
+        path: Path = FIXTURE_DIR / f"{signature}.json"
+        path.write_text(json.dumps(fixture, indent=2))
+        print(f"recorded {path}")
+    await clients.close()
+
+
+def verify() -> bool:
+    ok: bool = True
+    for path in sorted(FIXTURE_DIR.glob("*.json")):
+        fixture: Dict[str, Any] = json.loads(path.read_text())
+        decoded: Dict[str, Any] = decode_base64_transaction(fixture["base64"])
+        same_keys: bool = (
+            decoded["transaction"]["message"]["accountKeys"]
+            == fixture["json"]["transaction"]["message"]["accountKeys"]
+        )
+        from_json: Optional[TradeEvent] = decode_trade(
+            fixture["json"], fixture["wallet"]
+        )
+        from_base64: Optional[TradeEvent] = decode_trade(decoded, fixture["wallet"])
+        matches: bool = same_keys and from_json == from_base64
+        ok = ok and matches
+        print(f"{'ok' if matches else 'MISMATCH':<8} {path.name} {from_json}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check that base64 getTransaction results classify like json ones."
+    )
+    parser.add_argument("--record", nargs="+", metavar="SIGNATURE")
+    parser.add_argument("--wallet", help="Wallet to classify for (default: fee payer)")
+    args = parser.parse_args()
+
+    if args.record:
+        logger.Logger.start(name="memecoin", level="DEBUG", log_dir="logs")
+        asyncio.run(record(args.record, args.wallet))
+    if not verify():
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import asyncio
 import functools
+import logging
+import random
 from collections.abc import Awaitable
 from collections.abc import Callable
 from datetime import datetime
@@ -9,10 +11,33 @@ from typing import Tuple
 from typing import Type
 
 import lib.log as logger
+import lib.metrics as metrics
+
+
+class RateLimitError(ValueError):
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UpstreamUnavailableError(RateLimitError):
+    pass
+
+
+class CircuitOpenError(ValueError):
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def backoff_delay(attempt: int, retry_delay: float, max_delay: float) -> float:
+    # Exponential backoff with "equal jitter", so retries don't fire in lockstep.
+    delay: float = min(max_delay, retry_delay * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
 
 
 def retry_error(
-    max_retries: int = 5, retry_delay: int = 2
+    max_retries: int = 5, retry_delay: float = 2, max_delay: float = 10
 ) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Optional[Any]]]]:
     def decorator(
         func: Callable[..., Awaitable[Any]]
@@ -22,15 +47,33 @@ def retry_error(
             for attempt in range(1, max_retries + 1):
                 try:
                     return await func(*args, **kwargs)
+                except CircuitOpenError as e:
+                    # The upstream is known to be down: give up now, not after every retry.
+                    metrics.RETRY_FAILURES.labels(func.__name__).inc()
+                    logger.throttled(
+                        logging.WARNING,
+                        f"circuit_open:{func.__name__}",
+                        f"{func.__name__} Failed fast: {e}",
+                    )
+                    return None
                 except Exception as e:
                     if attempt < max_retries:
-                        logger.info(
-                            f"{func.__name__} Retrying... Attempt {attempt}/{max_retries}"
+                        delay: float = backoff_delay(attempt, retry_delay, max_delay)
+                        if isinstance(e, RateLimitError) and e.retry_after:
+                            delay = max(delay, e.retry_after)
+                        metrics.RETRIES.labels(func.__name__).inc()
+                        logger.throttled(
+                            logging.INFO,
+                            f"retry:{func.__name__}",
+                            f"{func.__name__} Retrying in {delay:.2f}s... Attempt {attempt}/{max_retries}",
                         )
-                        await asyncio.sleep(retry_delay)
+                        await asyncio.sleep(delay)
                     else:
-                        logger.warning(
-                            f"{func.__name__} Failed after {max_retries} attempts: {e}"
+                        metrics.RETRY_FAILURES.labels(func.__name__).inc()
+                        logger.throttled(
+                            logging.WARNING,
+                            f"retry_failed:{func.__name__}",
+                            f"{func.__name__} Failed after {max_retries} attempts: {e}",
                         )
                         return None
             return None
@@ -1,20 +1,35 @@
+import atexit
 import functools
 import logging
 import os
+import queue
+import threading
+import time
 from collections.abc import Callable
 from datetime import datetime
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from traceback import format_exc
 from typing import Any
+from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
+LOG_MAX_BYTES: int = 50 * 1024 * 1024
+LOG_BACKUP_COUNT: int = 5
+THROTTLE_INTERVAL: float = 10.0
+
 logger: "Logger"
 debug: Callable[[Any], None]
 info: Callable[[Any], None]
 warning: Callable[[Any], None]
 error: Callable[[Any], None]
 exception: Callable[[Any], None]
+throttled: Callable[..., None]
 
 
 class ModuleLogFilter(logging.Filter):
@@ -26,6 +41,35 @@ class ModuleLogFilter(logging.Filter):
         return self.module_name == rec.module
 
 
+class CachingFormatter(logging.Formatter):
+    # Every file handler shares one formatter, so format each record only once.
+    def format(self, record: logging.LogRecord) -> str:
+        cached: Optional[Tuple[logging.Formatter, str]] = getattr(
+            record, "_formatted", None
+        )
+        if cached is not None and cached[0] is self:
+            return cached[1]
+        text: str = super().format(record)
+        setattr(record, "_formatted", (self, text))
+        return text
+
+
+class LogThrottle:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._last_logged: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def allow(self, key: str, interval: float) -> Tuple[bool, int]:
+        now: float = time.monotonic()
+        with self._lock:
+            if now - self._last_logged.get(key, float("-inf")) < interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False, 0
+            self._last_logged[key] = now
+            return True, self._suppressed.pop(key, 0)
+
+
 class Logger(logging.Logger):
     info_log_path: Optional[str]
 
@@ -34,6 +78,8 @@ class Logger(logging.Logger):
         name: Optional[str] = None,
         level: Union[str, int] = logging.INFO,
         log_dir: Union[None, str, Path] = None,
+        max_bytes: int = LOG_MAX_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
     ) -> None:
         if name is None:
             name = "project_logger"
@@ -50,17 +96,29 @@ class Logger(logging.Logger):
                 last_link.symlink_to(log_suffix, target_is_directory=True)
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
-        self.fmt = logging.Formatter(
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.fmt = CachingFormatter(
             "%(asctime)s [%(filename)s:%(funcName)s():%(lineno)s] - %(message)s",
             "%H:%M:%S",
         )
+        self.throttle = LogThrottle()
+
+        # Records are only queued on the caller's thread; formatting and all
+        # file/stderr I/O happen on the listener thread.
+        self.output_handlers: List[logging.Handler] = []
+        self.listener = QueueListener(queue.SimpleQueue(), respect_handler_level=True)
+        self.addHandler(QueueHandler(self.listener.queue))
 
         self.setLevel(level)
         self.add_file_handler(logging.DEBUG)
         self.add_file_handler(logging.INFO)
         self.add_file_handler(logging.WARNING)
         self.add_file_handler(logging.ERROR)
-        self.addHandler(self.create_stderr_handler(logging.ERROR))
+        self.add_output_handler(self.create_stderr_handler(logging.ERROR))
+        self.listener.start()
+        self.closed: bool = False
+        atexit.register(self.close)
 
     def add_file_handler(self, level: int) -> None:
         if self.level <= level:
@@ -68,7 +126,19 @@ class Logger(logging.Logger):
             if level == logging.INFO:
                 setattr(self, "info_log_path", log_path)
             log_handler = self.create_file_handler(log_path, level)
-            self.addHandler(log_handler)
+            self.add_output_handler(log_handler)
+
+    def add_output_handler(self, handler: logging.Handler) -> None:
+        self.output_handlers.append(handler)
+        self.listener.handlers = tuple(self.output_handlers)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.listener.stop()
+        for handler in self.output_handlers:
+            handler.close()
 
     @classmethod
     def start(
@@ -76,16 +146,30 @@ class Logger(logging.Logger):
         name: Optional[str] = None,
         level: Union[str, int] = logging.INFO,
         log_dir: Union[None, str, Path] = None,
+        max_bytes: int = LOG_MAX_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
     ) -> None:
-        globals()["logger"] = logger = cls(name, level, log_dir)
+        previous: Optional[Logger] = globals().get("logger")
+        if previous is not None:
+            previous.close()
+        globals()["logger"] = logger = cls(
+            name, level, log_dir, max_bytes, backup_count
+        )
         globals()["debug"] = logger.debug
         globals()["info"] = logger.info
         globals()["warning"] = logger.warning
         globals()["error"] = logger.error
         globals()["exception"] = logger.exception
+        globals()["throttled"] = logger.throttled
 
     def create_file_handler(self, path: Path, level: int) -> logging.Handler:
-        handler = logging.FileHandler(path, "a", encoding="utf-8")
+        handler = RotatingFileHandler(
+            path,
+            "a",
+            maxBytes=self.max_bytes,
+            backupCount=self.backup_count,
+            encoding="utf-8",
+        )
         handler.setFormatter(self.fmt)
         handler.setLevel(level)
         return handler
@@ -101,7 +185,7 @@ class Logger(logging.Logger):
         path = Path(f"{self.log_dir}/{last_name}.log")
         handler = self.create_file_handler(path, level)
         handler.addFilter(ModuleLogFilter(last_name))
-        self.addHandler(handler)
+        self.add_output_handler(handler)
 
     def debug(self, msg: object, *args: Any, **kwargs: Any) -> None:
         super().debug(msg, stacklevel=2, *args, **kwargs)
@@ -115,6 +199,24 @@ class Logger(logging.Logger):
     def error(self, msg: object, *args: Any, **kwargs: Any) -> None:
         super().error(msg, stacklevel=2, *args, **kwargs)
 
+    def throttled(
+        self,
+        level: int,
+        key: str,
+        msg: object,
+        interval: float = THROTTLE_INTERVAL,
+    ) -> None:
+        # For hot paths such as retry notices: at most one record per key and
+        # interval, reporting how many were dropped since the last one.
+        if not self.isEnabledFor(level):
+            return
+        allowed, suppressed = self.throttle.allow(key, interval)
+        if not allowed:
+            return
+        if suppressed:
+            msg = f"{msg} ({suppressed} similar messages suppressed)"
+        super().log(level, msg, stacklevel=2)
+
     def print(self, *args: Any) -> None:
         super().debug(str(" ".join([str(x) for x in args])), stacklevel=3)
 
@@ -0,0 +1,12 @@
+import asyncio
+
+import lib.metrics as metrics
+
+
+async def monitor_loop_lag(interval: float) -> None:
+    # A sleep that wakes up late means something held the event loop that long.
+    loop = asyncio.get_running_loop()
+    while True:
+        started_at: float = loop.time()
+        await asyncio.sleep(interval)
+        metrics.EVENT_LOOP_LAG.observe(max(0.0, loop.time() - started_at - interval))
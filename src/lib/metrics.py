@@ -0,0 +1,116 @@
+from typing import Tuple
+from urllib.parse import urlparse
+
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+TOOL_LATENCY = Histogram(
+    "tool_latency_seconds",
+    "Time spent answering an MCP tool call.",
+    ["tool", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+RPC_LATENCY = Histogram(
+    "rpc_latency_seconds",
+    "Solana RPC round trip time, excluding time queued in the limiter.",
+    ["endpoint", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+RETRIES = Counter(
+    "retries_total",
+    "Attempts retried by retry_error.",
+    ["function"],
+)
+RETRY_FAILURES = Counter(
+    "retry_failures_total",
+    "Calls that still failed after every retry_error attempt.",
+    ["function"],
+)
+LIMITER_QUEUE_DEPTH = Gauge(
+    "rpc_limiter_queue_depth",
+    "Requests waiting for an RPC concurrency slot.",
+    ["endpoint"],
+)
+LIMITER_IN_FLIGHT = Gauge(
+    "rpc_limiter_in_flight",
+    "RPC requests currently holding a concurrency slot.",
+    ["endpoint"],
+)
+LIMITER_CONCURRENCY = Gauge(
+    "rpc_limiter_concurrency_limit",
+    "Current adaptive concurrency limit.",
+    ["endpoint"],
+)
+RPC_HEDGES = Counter(
+    "rpc_hedged_requests_total",
+    "Duplicate RPC requests sent after the first outlived the p95, by which copy won.",
+    ["method", "winner"],
+)
+CIRCUIT_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state per upstream: 0 closed, 1 half open, 2 open.",
+    ["breaker"],
+)
+CIRCUIT_REJECTIONS = Counter(
+    "circuit_breaker_rejections_total",
+    "Calls failed fast because the upstream's circuit breaker was open.",
+    ["breaker"],
+)
+RPC_ENDPOINT_EJECTED = Gauge(
+    "rpc_endpoint_ejected",
+    "1 while the RPC pool has ejected the endpoint.",
+    ["endpoint"],
+)
+RPC_ENDPOINT_LATENCY = Gauge(
+    "rpc_endpoint_latency_ewma_seconds",
+    "Moving-average latency the RPC pool routes on.",
+    ["endpoint", "method"],
+)
+RPC_ENDPOINT_ERROR_RATE = Gauge(
+    "rpc_endpoint_error_rate_ewma",
+    "Moving-average error rate the RPC pool routes on.",
+    ["endpoint", "method"],
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ["cache", "result"],
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop woke up a periodic timer.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+TRANSACTIONS_CLASSIFIED = Counter(
+    "transactions_classified_total",
+    "Transaction details decoded into a trade or a non-trade.",
+    ["result"],
+)
+
+
+def endpoint_label(url: str) -> str:
+    # Label by host only: RPC URLs often carry an API key in the path or query.
+    return urlparse(url).hostname or url
+
+
+def record_cache_lookup(cache: str, hit: bool, count: int = 1) -> None:
+    if count:
+        CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc(count)
@@ -0,0 +1,102 @@
+import cProfile
+import random
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+from typing import Optional
+
+import lib.log as logger
+from settings import settings
+
+TRACEMALLOC_TOP_STATS: int = 30
+
+# Tasks spawned inside a call inherit this dict, so spans from concurrent
+# workers add up: a stage can report more time than the call's wall clock.
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("timings", default=None)
+_profiling: bool = False
+
+
+def add_timing(name: str, seconds: float) -> None:
+    timings: Optional[Dict[str, float]] = _timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    started_at: float = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(name, time.perf_counter() - started_at)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    timings: Dict[str, float] = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def profile_path(name: str, suffix: str) -> Path:
+    profile_dir: Path = settings.log_dir / "profiles"
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    return profile_dir / f"{name}_{datetime.now():%Y-%m-%d_%H-%M-%S_%f}{suffix}"
+
+
+@contextmanager
+def profile_call(name: str) -> Iterator[None]:
+    # cProfile and tracemalloc are process-wide, so only one call is profiled at a
+    # time and, while it runs, concurrent calls show up in its profile too.
+    global _profiling
+    mode: str = settings.profile_mode
+    if (
+        mode == "off"
+        or _profiling
+        or random.random() >= settings.profile_sample_rate
+        or (mode == "tracemalloc" and tracemalloc.is_tracing())
+    ):
+        yield
+        return
+
+    _profiling = True
+    profiler: Optional[cProfile.Profile] = None
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        tracemalloc.start()
+    started_at: float = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration: float = time.perf_counter() - started_at
+        slow: bool = duration >= settings.profile_threshold
+        try:
+            if profiler is not None:
+                profiler.disable()
+                if slow:
+                    path: Path = profile_path(name, ".prof")
+                    profiler.dump_stats(path)
+                    logger.info(f"{name} took {duration:.2f}s, profile in {path}")
+            else:
+                if slow:
+                    _, peak = tracemalloc.get_traced_memory()
+                    stats = tracemalloc.take_snapshot().statistics("lineno")
+                    path = profile_path(name, ".txt")
+                    with open(path, "w", encoding="utf-8") as file:
+                        file.write(f"duration: {duration:.3f}s, peak: {peak} bytes\n")
+                        for stat in stats[:TRACEMALLOC_TOP_STATS]:
+                            file.write(f"{stat}\n")
+                    logger.info(f"{name} took {duration:.2f}s, profile in {path}")
+                tracemalloc.stop()
+        finally:
+            _profiling = False
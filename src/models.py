@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseModel
 from pydantic import Field
 
@@ -29,3 +31,13 @@ class IsBotTradingInput(BaseModel):
 
 class GetTokenPriceInput(BaseModel):
     token: str = Field(..., description="Token mint address")
+
+
+class GetTokenPricesInput(BaseModel):
+    tokens: List[str] = Field(..., description="Token mint addresses")
+
+
+class AnalyzeWalletsInput(BaseModel):
+    wallet_addresses: List[str] = Field(
+        ..., description="Solana wallet addresses", min_length=1, max_length=500
+    )
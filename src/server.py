@@ -1,29 +1,67 @@
+import argparse
+import asyncio
 import json
+import time
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable
+from collections.abc import Callable
+from contextlib import asynccontextmanager
 from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
 
 import lib.log as logger
+import lib.metrics as metrics
 import uvicorn
+from analyser import analyze_wallets
 from analyser import calculate_profit_for_each_token
 from analyser import calculate_profit_per_token
 from analyser import calculate_total_profit
 from analyser import calculate_win_rate
 from analyser import get_purchased_tokens
 from analyser import get_token_price
+from analyser import get_token_prices
 from analyser import is_bot_trading
+from analyser import ONE_WEEK
+from lib.loop_lag import monitor_loop_lag
+from lib.timing import collect_timings
+from lib.timing import profile_call
+from lib.timing import span
 from mcp.server import Server
 from mcp.server.sse import SseServerTransport
 from mcp.types import TextContent
 from mcp.types import Tool
+from models import AnalyzeWalletsInput
 from models import CalculateProfitForEachTokenInput
 from models import CalculateProfitPerTokenInput
 from models import CalculateTotalProfitInput
 from models import CalculateWinRateInput
 from models import GetPurchasedTokensInput
 from models import GetTokenPriceInput
+from models import GetTokenPricesInput
 from models import IsBotTradingInput
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import generate_latest
+from pydantic import BaseModel
+from settings import settings
 from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
 from starlette.routing import Mount
 from starlette.routing import Route
+from utils.clients import clients
+from utils.clients import get_http_session
+from utils.ledger import expect_newest_signatures
+from utils.rate_limit import get_limiter_snapshots
+from utils.result_cache import CachedResult
+from utils.result_cache import result_cache
+from utils.result_cache import ResultKey
+from utils.rpc_pool import get_rpc_pool
+from utils.tools import get_latest_signatures
+from utils.tx_cache import close_transaction_cache
 
 server = Server("analysis-api")
 sse = SseServerTransport("/messages/")
@@ -67,72 +105,142 @@ async def handle_list_tools() -> list[Tool]:
             description="Get the current price of a specific token by its mint address. The price is calculated either from an exchange or based on the bonding curve data, depending on the token's state.",
             inputSchema=GetTokenPriceInput.model_json_schema(),
         ),
+        Tool(
+            name="get-token-prices",
+            description="Get the current prices of several tokens by their mint addresses in one call. Each price is calculated either from an exchange or based on the bonding curve data, depending on the token's state.",
+            inputSchema=GetTokenPricesInput.model_json_schema(),
+        ),
+        Tool(
+            name="analyze-wallets",
+            description="Analyze a batch of wallet addresses together, returning the 7-day total profit, win rate and bot-trading flag of each wallet. Results are listed in the order the wallets finish.",
+            inputSchema=AnalyzeWalletsInput.model_json_schema(),
+        ),
     ]
 
 
+async def collect_analyze_wallets(wallet_addresses: List[str]) -> List[Dict[str, Any]]:
+    return [result async for result in analyze_wallets(wallet_addresses)]
+
+
+TOOL_HANDLERS: Dict[str, Tuple[Type[BaseModel], Callable[[Any], Awaitable[Any]]]] = {
+    "calculate-total-profit": (
+        CalculateTotalProfitInput,
+        lambda input_data: calculate_total_profit(input_data.wallet_address),
+    ),
+    "get-purchased-tokens": (
+        GetPurchasedTokensInput,
+        lambda input_data: get_purchased_tokens(input_data.wallet_address),
+    ),
+    "calculate-profit-per-token": (
+        CalculateProfitPerTokenInput,
+        lambda input_data: calculate_profit_per_token(
+            input_data.wallet_address, input_data.token
+        ),
+    ),
+    "calculate-profit-for-each-token": (
+        CalculateProfitForEachTokenInput,
+        lambda input_data: calculate_profit_for_each_token(input_data.wallet_address),
+    ),
+    "calculate-win-rate": (
+        CalculateWinRateInput,
+        lambda input_data: calculate_win_rate(input_data.wallet_address),
+    ),
+    "is-bot-trading": (
+        IsBotTradingInput,
+        lambda input_data: is_bot_trading(input_data.wallet_address),
+    ),
+    "get-token-price": (
+        GetTokenPriceInput,
+        lambda input_data: get_token_price(input_data.token),
+    ),
+    "get-token-prices": (
+        GetTokenPricesInput,
+        lambda input_data: get_token_prices(input_data.tokens),
+    ),
+    "analyze-wallets": (
+        AnalyzeWalletsInput,
+        lambda input_data: collect_analyze_wallets(input_data.wallet_addresses),
+    ),
+}
+
+
+def serialize(result: Any) -> str:
+    with span("serialization"):
+        return json.dumps(result)
+
+
+def wallets_of(input_data: BaseModel) -> List[str]:
+    if isinstance(input_data, AnalyzeWalletsInput):
+        return list(input_data.wallet_addresses)
+    wallet_address: Optional[str] = getattr(input_data, "wallet_address", None)
+    return [wallet_address] if wallet_address else []
+
+
+async def run_cached_tool(
+    name: str, input_data: BaseModel, handler: Callable[[Any], Awaitable[Any]]
+) -> str:
+    wallets: List[str] = wallets_of(input_data)
+    if not wallets:
+        return serialize(await handler(input_data))
+
+    key: ResultKey = result_cache.make_key(name, input_data.model_dump(), ONE_WEEK)
+    cached: Optional[CachedResult] = result_cache.get(key)
+    if cached is not None and get_rpc_pool().all_circuits_open():
+        # Every RPC is down, so it can't be revalidated; a stale answer beats none.
+        metrics.record_cache_lookup("tool_result", True)
+        return cached.text
+    try:
+        with span("result_cache_check"):
+            newest_signatures: Dict[str, Optional[str]] = await get_latest_signatures(
+                get_http_session(), wallets
+            )
+    except ValueError:
+        # Without a check nothing can be reused or stored, but the tool still runs.
+        metrics.record_cache_lookup("tool_result", False)
+        return serialize(await handler(input_data))
+    hit: bool = cached is not None and cached.newest_signatures == newest_signatures
+    metrics.record_cache_lookup("tool_result", hit)
+    if cached is not None and hit:
+        return cached.text
+
+    with expect_newest_signatures(newest_signatures) as check:
+        text: str = serialize(await handler(input_data))
+    # Only store what was computed from ledgers that saw exactly these signatures.
+    if check.consistent:
+        result_cache.put(key, text, newest_signatures)
+    return text
+
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict | None) -> Any:
-    if name == "calculate-total-profit":
-        try:
-            input_data = CalculateTotalProfitInput(**arguments)
-            result = await calculate_total_profit(input_data.wallet_address)
-            return [TextContent(type="text", text=json.dumps(result))]
-        except Exception as e:
-            raise ValueError(f"Error in calculate-total-profit: {e}")
-
-    elif name == "get-purchased-tokens":
-        try:
-            input_data = GetPurchasedTokensInput(**arguments)
-            result = await get_purchased_tokens(input_data.wallet_address)
-            return [TextContent(type="text", text=json.dumps(result))]
-        except Exception as e:
-            raise ValueError(f"Error in get-purchased-tokens: {e}")
-
-    elif name == "calculate-profit-per-token":
-        try:
-            input_data = CalculateProfitPerTokenInput(**arguments)
-            result = await calculate_profit_per_token(
-                input_data.wallet_address, input_data.token
-            )
-            return [TextContent(type="text", text=json.dumps(result))]
-        except Exception as e:
-            raise ValueError(f"Error in calculate-profit-per-token: {e}")
-
-    elif name == "calculate-profit-for-each-token":
-        try:
-            input_data = CalculateProfitForEachTokenInput(**arguments)
-            result = await calculate_profit_for_each_token(input_data.wallet_address)
-            return [TextContent(type="text", text=json.dumps(result))]
-        except Exception as e:
-            raise ValueError(f"Error in calculate-profit-for-each-token: {e}")
-
-    elif name == "calculate-win-rate":
-        try:
-            input_data = CalculateWinRateInput(**arguments)
-            result = await calculate_win_rate(input_data.wallet_address)
-            return [TextContent(type="text", text=json.dumps(result))]
-        except Exception as e:
-            raise ValueError(f"Error in calculate-win-rate: {e}")
-
-    elif name == "is-bot-trading":
-        try:
-            input_data = IsBotTradingInput(**arguments)
-            result = await is_bot_trading(input_data.wallet_address)
-            return [TextContent(type="text", text=json.dumps(result))]
-        except Exception as e:
-            raise ValueError(f"Error in is-bot-trading: {e}")
-
-    elif name == "get-token-price":
-        try:
-            input_data = GetTokenPriceInput(**arguments)
-            result = await get_token_price(input_data.token)
-            return [TextContent(type="text", text=json.dumps(result))]
-        except Exception as e:
-            raise ValueError(f"Error in get-token-price: {e}")
-
-    else:
+    if name not in TOOL_HANDLERS:
         raise ValueError(f"Unknown tool: {name}")
 
+    input_model, handler = TOOL_HANDLERS[name]
+    status: str = "error"
+    started_at: float = time.perf_counter()
+    try:
+        input_data = input_model(**(arguments or {}))
+        with collect_timings() as timings, profile_call(name):
+            text: str = await run_cached_tool(name, input_data, handler)
+        status = "ok"
+        content: List[TextContent] = [TextContent(type="text", text=text)]
+        if settings.timing_breakdown:
+            breakdown: Dict[str, float] = {
+                stage: round(seconds, 6) for stage, seconds in timings.items()
+            }
+            breakdown["total"] = round(time.perf_counter() - started_at, 6)
+            content.append(
+                TextContent(type="text", text=json.dumps({"timings": breakdown}))
+            )
+        return content
+    except Exception as e:
+        raise ValueError(f"Error in {name}: {e}")
+    finally:
+        metrics.TOOL_LATENCY.labels(name, status).observe(
+            time.perf_counter() - started_at
+        )
+
 
 async def handle_sse(request):
     async with sse.connect_sse(
@@ -141,16 +249,58 @@ async def handle_sse(request):
         await server.run(streams[0], streams[1], server.create_initialization_options())
 
 
+async def handle_metrics(request: Request) -> Response:
+    for endpoint, snapshot in get_limiter_snapshots().items():
+        host: str = metrics.endpoint_label(endpoint)
+        metrics.LIMITER_QUEUE_DEPTH.labels(host).set(snapshot["queue_depth"])
+        metrics.LIMITER_IN_FLIGHT.labels(host).set(snapshot["in_flight"])
+        metrics.LIMITER_CONCURRENCY.labels(host).set(snapshot["concurrency_limit"])
+    for endpoint, pool_snapshot in get_rpc_pool().snapshot().items():
+        host = metrics.endpoint_label(endpoint)
+        metrics.RPC_ENDPOINT_EJECTED.labels(host).set(pool_snapshot["ejected"])
+        for method, latency in pool_snapshot["latency"].items():
+            if latency is not None:
+                metrics.RPC_ENDPOINT_LATENCY.labels(host, method).set(latency)
+        for method, error_rate in pool_snapshot["error_rate"].items():
+            metrics.RPC_ENDPOINT_ERROR_RATE.labels(host, method).set(error_rate)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 routes = [
     Route("/sse", endpoint=handle_sse),
+    Route("/metrics", endpoint=handle_metrics),
     Mount("/messages/", app=sse.handle_post_message),
 ]
 
-starlette_app = Starlette(routes=routes, debug=True)
+
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    await clients.start()
+    loop_lag_task: Optional[asyncio.Task[None]] = None
+    if settings.loop_lag_interval > 0:
+        loop_lag_task = asyncio.create_task(
+            monitor_loop_lag(settings.loop_lag_interval)
+        )
+    try:
+        yield
+    finally:
+        if loop_lag_task is not None:
+            loop_lag_task.cancel()
+        await clients.close()
+        close_transaction_cache()
+
+
+starlette_app = Starlette(routes=routes, debug=True, lifespan=lifespan)
 
 
 def start_server(host: str = "0.0.0.0", port: int = 3005):
-    logger.Logger.start(name="memecoin", level="DEBUG", log_dir="logs")
+    logger.Logger.start(
+        name="memecoin",
+        level="DEBUG",
+        log_dir=settings.log_dir,
+        max_bytes=settings.log_max_bytes,
+        backup_count=settings.log_backup_count,
+    )
 
     logger.info(f"Starting server on {host}:{port}")
     try:
@@ -161,4 +311,8 @@ def start_server(host: str = "0.0.0.0", port: int = 3005):
 
 
 if __name__ == "__main__":
-    start_server()
+    parser = argparse.ArgumentParser(description="Run the wallet analysis MCP server.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=3005)
+    args = parser.parse_args()
+    start_server(args.host, args.port)
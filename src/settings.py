@@ -1,19 +1,50 @@
 from pathlib import Path
+from typing import List
+from typing import Literal
+from typing import Optional
 from typing import Type
 from typing import Union
 
+from pydantic import BaseModel
 from pydantic import validator
 from pydantic_settings import BaseSettings
 from pydantic_settings import SettingsConfigDict
 from solders.pubkey import Pubkey
 
 
+class RpcEndpoint(BaseModel):
+    url: str
+    weight: float = 1.0
+    requests_per_second: Optional[float] = None
+    max_concurrency: Optional[int] = None
+    # Only route these JSON-RPC methods here; None means every method.
+    methods: Optional[List[str]] = None
+
+
 class Settings(BaseSettings):
     model_config: SettingsConfigDict = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8"
     )
 
     solana_rpc: str = "https://api.mainnet-beta.solana.com"
+    rpc_endpoints: List[RpcEndpoint] = []
+    rpc_eject_after_failures: int = 5
+    rpc_ejection_time: float = 5.0
+    rpc_readmit_period: float = 30.0
+    rpc_hedge_budget: float = 0.0
+    rpc_hedge_min_delay: float = 0.05
+    jupiter_price_url: str = "https://api.jup.ag/price/v2"
+    transaction_encoding: Literal["json", "base64"] = "json"
+    rpc_batch_size: int = 1
+    rpc_batch_flush_interval: float = 0.005
+    rpc_max_concurrency: int = 100
+    rpc_min_concurrency: int = 4
+    rpc_requests_per_second: float = 0
+
+    http_pool_limit: int = 200
+    http_pool_limit_per_host: int = 100
+    http_dns_cache_ttl: int = 300
+    http_keepalive_timeout: float = 30.0
     sol_decimals: int = 9
     token_decimals: int = 6
     mint_sol: Pubkey = Pubkey.from_string("So11111111111111111111111111111111111111112")
@@ -22,6 +53,32 @@ class Settings(BaseSettings):
     )
 
     log_dir: Path = Path("logs")
+    loop_lag_interval: float = 0.1
+    log_max_bytes: int = 50 * 1024 * 1024
+    log_backup_count: int = 5
+    timing_breakdown: bool = False
+    profile_mode: Literal["off", "cprofile", "tracemalloc"] = "off"
+    profile_sample_rate: float = 1.0
+    profile_threshold: float = 5.0
+
+    price_cache_ttl: float = 10.0
+    price_cache_max_entries: int = 10_000
+    price_cache_stale_ttl: float = 300.0
+
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 30.0
+
+    analyze_wallets_concurrency: int = 16
+
+    result_cache_ttl: float = 300.0
+    result_cache_max_entries: int = 1024
+    result_cache_max_bytes: int = 64 * 1024 * 1024
+
+    ledger_ttl: int = 60
+    ledger_cache_size: int = 256
+
+    tx_cache_path: Path = Path("cache/transactions.sqlite3")
+    tx_cache_max_entries: int = 200_000
 
     @validator(
         "mint_sol",
@@ -5,6 +5,7 @@ from typing import List
 import lib.log as logger
 from mcp.types import TextContent
 from server import call_tool
+from utils.clients import clients
 
 
 async def main() -> None:
@@ -45,6 +46,16 @@ async def main() -> None:
     result7: List[TextContent] = await call_tool("get-token-price", arguments7)
     print(result7)
 
+    arguments8: Dict[str, List[str]] = {"tokens": [mint_token]}
+    result8: List[TextContent] = await call_tool("get-token-prices", arguments8)
+    print(result8)
+
+    arguments9: Dict[str, List[str]] = {"wallet_addresses": [wallet_address]}
+    result9: List[TextContent] = await call_tool("analyze-wallets", arguments9)
+    print(result9)
+
+    await clients.close()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import pytest
+import utils.tools as tools
+
+PAGES: int = 10
+PAGE_SIZE: int = 1000
+WORKERS: int = 4
+
+
+async def synthetic_pages() -> Any:
+    for page in range(PAGES):
+        yield [{"signature": f"s{page}x{i}"} for i in range(PAGE_SIZE)]
+
+
+async def pass_through(
+    page: List[Dict[str, Any]], wallet_address: str, time_threshold: int
+) -> List[Dict[str, Any]]:
+    return page
+
+
+async def consume() -> None:
+    async for _ in tools.process_transaction_pages(
+        None, synthetic_pages(), "wallet", 0, workers=WORKERS  # type: ignore
+    ):
+        pass
+
+
+def test_worker_error_is_raised_without_hanging(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: int = 0
+
+    async def fetch_trade(*args: Any) -> Optional[Any]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        if calls == 10:
+            raise KeyError("meta")
+        return None
+
+    monkeypatch.setattr(tools, "prefilter_signatures", pass_through)
+    monkeypatch.setattr(tools, "fetch_trade", fetch_trade)
+    with pytest.raises(KeyError):
+        asyncio.run(asyncio.wait_for(consume(), timeout=5))
@@ -1,5 +1,8 @@
+import asyncio
+import functools
 from typing import Any
 from typing import Dict
+from typing import List
 from typing import Optional
 from typing import Tuple
 
@@ -7,11 +10,15 @@ from decorator import retry_error  # type: ignore
 from settings import settings
 from solana.rpc.async_api import AsyncClient
 from solders.pubkey import Pubkey
+from utils.circuit_breaker import get_breaker
 from utils.data_handler import token_data_from_bonding_curve_token_acc_buffer
 
 BONDING_CURVE_SEED: str = "bonding-curve"
+MAX_ACCOUNTS_PER_REQUEST: int = 100
+PDA_CACHE_SIZE: int = 65536
 
 
+@functools.lru_cache(maxsize=PDA_CACHE_SIZE)
 def get_bonding_curve_pda(mint: Pubkey, program_id: Pubkey) -> Pubkey:
     seeds: list[bytes] = [BONDING_CURVE_SEED.encode("utf-8"), bytes(mint)]
     pda: Pubkey
@@ -26,12 +33,25 @@ async def get_bonding_curve_token_account(
     client: AsyncClient,
     bonding_curve: Pubkey,
 ) -> Dict[str, Any]:
-    account_info = await client.get_account_info(bonding_curve)
+    with get_breaker(settings.solana_rpc).guard():
+        account_info = await client.get_account_info(bonding_curve)
     if account_info is None or account_info.value is None:
         raise ValueError("Failed to get account info")
     return account_info.value
 
 
+@retry_error(max_retries=5, retry_delay=2)
+async def get_bonding_curve_token_accounts(
+    client: AsyncClient,
+    bonding_curves: List[Pubkey],
+) -> List[Optional[Any]]:
+    with get_breaker(settings.solana_rpc).guard():
+        accounts_info = await client.get_multiple_accounts(bonding_curves)
+    if accounts_info is None or accounts_info.value is None:
+        raise ValueError("Failed to get multiple accounts")
+    return accounts_info.value
+
+
 async def bonding_curve_data(
     client: AsyncClient, mint: Pubkey
 ) -> Tuple[Pubkey, Optional[Dict[str, Any]]]:
@@ -49,3 +69,34 @@ async def bonding_curve_data(
         return bonding_curve, token_data
     else:
         return bonding_curve, None
+
+
+async def bonding_curve_data_many(
+    client: AsyncClient, mints: List[Pubkey]
+) -> List[Tuple[Pubkey, Optional[Dict[str, Any]]]]:
+    program_id: Optional[Pubkey] = settings.pumpfun_program_id
+    assert program_id, "Can't find program id, please set it."
+
+    bonding_curves: List[Pubkey] = [
+        get_bonding_curve_pda(mint, program_id) for mint in mints
+    ]
+    chunks: List[List[Pubkey]] = [
+        bonding_curves[i : i + MAX_ACCOUNTS_PER_REQUEST]
+        for i in range(0, len(bonding_curves), MAX_ACCOUNTS_PER_REQUEST)
+    ]
+    chunk_accounts: List[Optional[List[Optional[Any]]]] = await asyncio.gather(
+        *(get_bonding_curve_token_accounts(client, chunk) for chunk in chunks)
+    )
+
+    results: List[Tuple[Pubkey, Optional[Dict[str, Any]]]] = []
+    for chunk, accounts in zip(chunks, chunk_accounts):
+        for index, bonding_curve in enumerate(chunk):
+            account_info: Optional[Any] = accounts[index] if accounts else None
+            if account_info and account_info.data:
+                token_data: Dict[str, Any] = (
+                    token_data_from_bonding_curve_token_acc_buffer(account_info.data)
+                )
+                results.append((bonding_curve, token_data))
+            else:
+                results.append((bonding_curve, None))
+    return results
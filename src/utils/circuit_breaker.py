@@ -0,0 +1,113 @@
+import asyncio
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Dict
+from typing import Optional
+
+import lib.log as logger
+import lib.metrics as metrics
+from decorator import CircuitOpenError  # type: ignore
+from decorator import RateLimitError  # type: ignore
+from decorator import UpstreamUnavailableError  # type: ignore
+from lib.metrics import endpoint_label
+from settings import settings
+
+CLOSED: str = "closed"
+OPEN: str = "open"
+HALF_OPEN: str = "half_open"
+STATE_VALUES: Dict[str, int] = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state: str = CLOSED
+        self.failures: int = 0
+        self.opened_at: float = 0.0
+        self.probing: bool = False
+        metrics.CIRCUIT_STATE.labels(name).set(STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str) -> None:
+        if state == self.state:
+            return
+        logger.warning(f"Circuit {self.name} {self.state} -> {state}")
+        self.state = state
+        metrics.CIRCUIT_STATE.labels(self.name).set(STATE_VALUES[state])
+
+    def is_open(self) -> bool:
+        return self.state != CLOSED
+
+    def allows_call(self) -> bool:
+        # Whether acquire would let a call through right now, without taking a probe.
+        if self.state == OPEN:
+            return time.monotonic() >= self.opened_at + self.reset_timeout
+        return self.state == CLOSED or not self.probing
+
+    def acquire(self) -> bool:
+        # Returns whether this call is the half-open probe.
+        if self.state == OPEN:
+            retry_in: float = self.opened_at + self.reset_timeout - time.monotonic()
+            if retry_in > 0:
+                metrics.CIRCUIT_REJECTIONS.labels(self.name).inc()
+                raise CircuitOpenError(f"Circuit {self.name} is open", retry_in)
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            # A single probe decides whether the upstream is back.
+            if self.probing:
+                metrics.CIRCUIT_REJECTIONS.labels(self.name).inc()
+                raise CircuitOpenError(f"Circuit {self.name} is half open")
+            self.probing = True
+            return True
+        return False
+
+    def release(self, success: Optional[bool], probe: bool = False) -> None:
+        # None means the call proved nothing either way, e.g. it was cancelled.
+        if probe:
+            self.probing = False
+        if success is None:
+            return
+        if success:
+            self.failures = 0
+            if probe:
+                self._set_state(CLOSED)
+            return
+        self.failures += 1
+        if probe or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        probe: bool = self.acquire()
+        success: Optional[bool] = False
+        try:
+            yield
+            success = True
+        except UpstreamUnavailableError:
+            raise
+        except (RateLimitError, asyncio.CancelledError):
+            # Rate limiting means the upstream is up, just busy.
+            success = None
+            raise
+        finally:
+            self.release(success, probe)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    # One breaker per upstream URL; it is named by host so API keys in the URL
+    # stay out of logs and metrics.
+    breaker: Optional[CircuitBreaker] = _breakers.get(url)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            endpoint_label(url),
+            settings.circuit_failure_threshold,
+            settings.circuit_reset_timeout,
+        )
+        _breakers[url] = breaker
+    return breaker
@@ -0,0 +1,64 @@
+from typing import Optional
+
+import aiohttp
+import httpx
+from settings import settings
+from solana.rpc.async_api import AsyncClient
+
+
+class ClientRegistry:
+    def __init__(self) -> None:
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._solana_client: Optional[AsyncClient] = None
+
+    def http_session(self) -> aiohttp.ClientSession:
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.http_pool_limit,
+                limit_per_host=settings.http_pool_limit_per_host,
+                ttl_dns_cache=settings.http_dns_cache_ttl,
+                keepalive_timeout=settings.http_keepalive_timeout,
+            )
+            self._http_session = aiohttp.ClientSession(connector=connector)
+        return self._http_session
+
+    async def solana_client(self) -> AsyncClient:
+        if self._solana_client is None:
+            client = AsyncClient(settings.solana_rpc)
+            # AsyncClient doesn't expose pool limits, so swap in a configured httpx
+            # client and close the default one it already opened.
+            default_session: httpx.AsyncClient = client._provider.session
+            client._provider.session = httpx.AsyncClient(
+                timeout=default_session.timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.http_pool_limit,
+                    max_keepalive_connections=settings.http_pool_limit_per_host,
+                    keepalive_expiry=settings.http_keepalive_timeout,
+                ),
+            )
+            self._solana_client = client
+            await default_session.aclose()
+        return self._solana_client
+
+    async def start(self) -> None:
+        self.http_session()
+        await self.solana_client()
+
+    async def close(self) -> None:
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+        if self._solana_client is not None:
+            await self._solana_client.close()
+            self._solana_client = None
+
+
+clients: ClientRegistry = ClientRegistry()
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    return clients.http_session()
+
+
+async def get_solana_client() -> AsyncClient:
+    return await clients.solana_client()
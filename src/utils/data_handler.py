@@ -1,23 +1,22 @@
+import struct
 from typing import Dict
+from typing import Tuple
 
-from construct import Flag
-from construct import Int64ul
-from construct import Struct
+# discriminator, virtualTokenReserves, virtualSolReserves, realTokenReserves,
+# realSolReserves, tokenTotalSupply as u64 (unsigned little-endian), complete as bool
+BONDING_CURVE_LAYOUT: struct.Struct = struct.Struct("<QQQQQQ?")
+BONDING_CURVE_FIELDS: Tuple[str, ...] = (
+    "discriminator",
+    "virtualTokenReserves",
+    "virtualSolReserves",
+    "realTokenReserves",
+    "realSolReserves",
+    "tokenTotalSupply",
+    "complete",
+)
 
 
 def token_data_from_bonding_curve_token_acc_buffer(
     buffer: bytes,
 ) -> Dict[str, int | bool]:
-    structure = Struct(
-        "discriminator" / Int64ul,  # u64 (unsigned little-endian)
-        "virtualTokenReserves" / Int64ul,  # u64 (unsigned little-endian)
-        "virtualSolReserves" / Int64ul,  # u64 (unsigned little-endian)
-        "realTokenReserves" / Int64ul,  # u64 (unsigned little-endian)
-        "realSolReserves" / Int64ul,  # u64 (unsigned little-endian)
-        "tokenTotalSupply" / Int64ul,  # u64 (unsigned little-endian)
-        "complete" / Flag,  # bool
-    )
-
-    value = structure.parse(buffer)
-
-    return dict(value)
+    return dict(zip(BONDING_CURVE_FIELDS, BONDING_CURVE_LAYOUT.unpack_from(buffer)))
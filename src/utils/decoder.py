@@ -0,0 +1,124 @@
+import base64
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+from settings import settings
+from solders.transaction import VersionedTransaction
+
+MINT_SOL: str = str(settings.mint_sol)
+BUY: str = "buy"
+SELL: str = "sell"
+
+
+class TradeEvent(NamedTuple):
+    mint: str
+    direction: str
+    lamports: int
+    fee: int
+    token_delta: int
+
+
+def decode_base64_transaction(transaction_details: Dict[str, Any]) -> Dict[str, Any]:
+    # Rebuild the part of the "json" encoding we read, so both modes share decode_trade.
+    encoded, _ = transaction_details["transaction"]
+    transaction = VersionedTransaction.from_bytes(base64.b64decode(encoded))
+    decoded: Dict[str, Any] = dict(transaction_details)
+    decoded["transaction"] = {
+        "signatures": [str(signature) for signature in transaction.signatures],
+        "message": {
+            "accountKeys": [str(key) for key in transaction.message.account_keys]
+        },
+    }
+    return decoded
+
+
+def find_account_index(account_keys: List[str], wallet_address: str) -> Optional[int]:
+    # The wallet is almost always the fee payer, so check that slot before scanning.
+    if account_keys and account_keys[0] == wallet_address:
+        return 0
+    try:
+        return account_keys.index(wallet_address)
+    except ValueError:
+        return None
+
+
+def decode_trade(
+    transaction_details: Dict[str, Any], wallet_address: str
+) -> Optional[TradeEvent]:
+    meta: Optional[Dict[str, Any]] = transaction_details.get("meta")
+    if not meta:
+        return None
+    pre_token_balances: List[Dict[str, Any]] = meta.get("preTokenBalances") or []
+    post_token_balances: List[Dict[str, Any]] = meta.get("postTokenBalances") or []
+
+    pre_amounts: Dict[int, int] = {}
+    token_delta_by_mint: Dict[str, int] = {}
+    for balance in pre_token_balances:
+        amount: int = int(balance["uiTokenAmount"]["amount"])
+        pre_amounts[balance["accountIndex"]] = amount
+        if balance.get("owner") == wallet_address:
+            token_delta_by_mint[balance["mint"]] = (
+                token_delta_by_mint.get(balance["mint"], 0) - amount
+            )
+
+    # One sweep: a trade is a change in a wallet-owned balance or, if the wallet
+    # owns none, in any non-SOL balance.
+    mint: Optional[str] = None
+    found_owner: bool = False
+    owner_changed: bool = False
+    other_changed: bool = False
+    for balance in post_token_balances:
+        balance_mint: str = balance["mint"]
+        if mint is None and balance_mint != MINT_SOL:
+            mint = balance_mint
+        post_amount: int = int(balance["uiTokenAmount"]["amount"])
+        is_owner: bool = balance.get("owner") == wallet_address
+        if is_owner:
+            token_delta_by_mint[balance_mint] = (
+                token_delta_by_mint.get(balance_mint, 0) + post_amount
+            )
+        pre_amount: Optional[int]
+        if pre_token_balances:
+            pre_amount = pre_amounts.get(balance["accountIndex"])
+            if pre_amount is None:
+                continue
+        else:
+            pre_amount = 0
+        changed: bool = post_amount != pre_amount
+        if is_owner:
+            found_owner = True
+            owner_changed = owner_changed or changed
+        elif changed and balance_mint != MINT_SOL:
+            other_changed = True
+
+    if not (owner_changed or (not found_owner and other_changed)):
+        return None
+
+    account_keys: List[str] = transaction_details["transaction"]["message"][
+        "accountKeys"
+    ]
+    if mint is None:
+        mint = next((key for key in account_keys if key.endswith("pump")), None)
+        if mint is None:
+            return None
+
+    fee: int = int(meta.get("fee", 0))
+    lamports: int = 0
+    wallet_index: Optional[int] = find_account_index(account_keys, wallet_address)
+    if wallet_index is not None:
+        lamports = (
+            int(meta["postBalances"][wallet_index])
+            - int(meta["preBalances"][wallet_index])
+            + fee
+        )
+
+    token_delta: int = token_delta_by_mint.get(mint, 0)
+    direction: str
+    if token_delta:
+        direction = BUY if token_delta > 0 else SELL
+    else:
+        direction = BUY if lamports < 0 else SELL
+    return TradeEvent(mint, direction, lamports, fee, token_delta)
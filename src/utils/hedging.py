@@ -0,0 +1,103 @@
+import asyncio
+import math
+from collections import deque
+from collections.abc import Awaitable
+from collections.abc import Callable
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from settings import settings
+
+LATENCY_WINDOW: int = 1000
+# Sorting the window on every request would cost more than hedging saves.
+QUANTILE_REFRESH_EVERY: int = 50
+MIN_SAMPLES: int = 50
+HEDGE_QUANTILE: float = 0.95
+# Hedges that may be spent back to back after a quiet period.
+MAX_HEDGE_BURST: float = 10.0
+
+
+class LatencyWindow:
+    def __init__(self, size: int = LATENCY_WINDOW) -> None:
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.quantile: Optional[float] = None
+        self._since_refresh: int = 0
+
+    def observe(self, latency: float) -> None:
+        self.samples.append(latency)
+        self._since_refresh += 1
+        if self._since_refresh >= QUANTILE_REFRESH_EVERY or (
+            self.quantile is None and len(self.samples) >= MIN_SAMPLES
+        ):
+            self._since_refresh = 0
+            ordered = sorted(self.samples)
+            self.quantile = ordered[
+                min(len(ordered) - 1, math.ceil(HEDGE_QUANTILE * len(ordered)) - 1)
+            ]
+
+
+class RequestHedger:
+    def __init__(self, budget: float, min_delay: float) -> None:
+        self.budget = budget
+        self.min_delay = min_delay
+        self.tokens: float = 0.0
+        self.windows: Dict[str, LatencyWindow] = {}
+
+    def observe(self, method: str, latency: float) -> None:
+        self.windows.setdefault(method, LatencyWindow()).observe(latency)
+
+    def delay(self, method: str) -> Optional[float]:
+        # Every request earns `budget` of a hedge, which caps hedges at that share.
+        if self.budget <= 0:
+            return None
+        self.tokens = min(MAX_HEDGE_BURST, self.tokens + self.budget)
+        window: Optional[LatencyWindow] = self.windows.get(method)
+        if window is None or window.quantile is None:
+            return None
+        return max(self.min_delay, window.quantile)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+async def hedged(
+    primary: Callable[[], Awaitable[Any]],
+    backup: Callable[[], Awaitable[Any]],
+    delay: float,
+    may_hedge: Callable[[], bool],
+) -> Tuple[Any, Optional[bool]]:
+    # Returns the first successful result and whether the backup won, None if unsent.
+    first: asyncio.Task[Any] = asyncio.ensure_future(primary())
+    pending: Set[asyncio.Task[Any]] = {first}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done or not may_hedge():
+            return await first, None
+        second: asyncio.Task[Any] = asyncio.ensure_future(backup())
+        pending.add(second)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), task is second
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+rpc_hedger: RequestHedger = RequestHedger(
+    settings.rpc_hedge_budget, settings.rpc_hedge_min_delay
+)
@@ -0,0 +1,206 @@
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import aiohttp
+import lib.metrics as metrics
+from lib.timing import add_timing
+from lib.timing import collect_timings
+from lib.timing import span
+from settings import settings
+from utils.clients import get_http_session
+from utils.single_flight import SingleFlight
+from utils.tools import iter_transaction_pages
+from utils.tools import process_transaction_pages
+from utils.trade_store import TradeStore
+
+SOL_DECIMALS: int = settings.sol_decimals
+
+
+class SignatureCheck:
+    def __init__(self, newest_signatures: Dict[str, Optional[str]]) -> None:
+        self.newest_signatures = newest_signatures
+        # Cleared when a ledger read under this check has not seen exactly these.
+        self.consistent: bool = True
+
+    def matches(self, ledger: "WalletLedger") -> bool:
+        expected: Optional[str] = self.newest_signatures.get(
+            ledger.wallet_address, ledger.newest_signature
+        )
+        return ledger.newest_signature == expected
+
+
+# Tasks spawned inside a checked call inherit the check, like timing spans do.
+_signature_check: ContextVar[Optional[SignatureCheck]] = ContextVar(
+    "signature_check", default=None
+)
+
+
+class WalletLedger:
+    def __init__(self, wallet_address: str, window: int) -> None:
+        self.wallet_address = wallet_address
+        self.window = window
+        self.built_at: float = 0.0
+        self.time_threshold: float = 0.0
+        self.trades: TradeStore = TradeStore()
+        # Newest signature already merged; later syncs only fetch what came after.
+        self.newest_signature: Optional[str] = None
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.built_at < ttl
+
+    async def build(self, session: aiohttp.ClientSession) -> "WalletLedger":
+        self.trades = TradeStore()
+        self.newest_signature = None
+        return await self.sync(session)
+
+    async def sync(self, session: aiohttp.ClientSession) -> "WalletLedger":
+        synced_at: float = time.time()
+        time_threshold: float = synced_at - self.window
+        newest_signature: Optional[str] = None
+        # Only a sync that classified every in-window signature may move the
+        # cursor; anything it missed would otherwise be skipped for good.
+        complete: bool = True
+
+        async def pages() -> AsyncIterator[List[Dict[str, Any]]]:
+            nonlocal newest_signature, complete
+            try:
+                async for page in iter_transaction_pages(
+                    session,
+                    self.wallet_address,
+                    time_threshold,
+                    until=self.newest_signature,
+                ):
+                    if newest_signature is None:
+                        newest_signature = page[0]["signature"]
+                    yield page
+            except ValueError:
+                complete = False
+
+        new_trades: TradeStore = TradeStore()
+        # Wall clock of the whole fetch pipeline; its per-item stages are summed
+        # across concurrent workers and can add up to far more than this.
+        with span("transaction_pipeline"):
+            async for item, trade, fetched in process_transaction_pages(
+                session, pages(), self.wallet_address, time_threshold
+            ):
+                if not fetched:
+                    complete = False
+                elif trade is not None:
+                    new_trades.append(
+                        item["signature"],
+                        trade.mint,
+                        item.get("blockTime", 0),
+                        item.get("slot", 0),
+                        trade.lamports,
+                        trade.fee,
+                    )
+        with span("aggregation"):
+            # Without a cursor this sync read the whole window, so nothing is kept.
+            trades: TradeStore = (
+                self.trades.since(time_threshold)
+                if self.newest_signature is not None
+                else TradeStore()
+            )
+            trades.extend(new_trades)
+        self.trades = trades
+        self.time_threshold = time_threshold
+        if complete:
+            if newest_signature is not None:
+                self.newest_signature = newest_signature
+            self.built_at = synced_at
+        else:
+            # Serve the partial result now, but rebuild the whole window next time.
+            self.newest_signature = None
+            self.built_at = 0.0
+        return self
+
+    def purchased_tokens(self) -> List[str]:
+        return self.trades.traded_mints()
+
+    def token_profit(self, token: str) -> float:
+        return self.trades.lamports_by_mint().get(token, 0) / (10**SOL_DECIMALS)
+
+    def token_profits(self) -> Dict[str, float]:
+        return {
+            mint: trade_sol / (10**SOL_DECIMALS)
+            for mint, trade_sol in self.trades.lamports_by_mint().items()
+        }
+
+
+_ledgers: "OrderedDict[Tuple[str, int], WalletLedger]" = OrderedDict()
+_ledger_syncs: SingleFlight = SingleFlight()
+
+
+async def _sync_wallet_ledger(
+    wallet_address: str, window: int, ledger: Optional[WalletLedger]
+) -> WalletLedger:
+    session: aiohttp.ClientSession = get_http_session()
+    if ledger is None:
+        ledger = await WalletLedger(wallet_address, window).build(session)
+    else:
+        ledger = await ledger.sync(session)
+    key: Tuple[str, int] = (wallet_address, window)
+    _ledgers[key] = ledger
+    _ledgers.move_to_end(key)
+    while len(_ledgers) > settings.ledger_cache_size:
+        _ledgers.popitem(last=False)
+    return ledger
+
+
+def clear_wallet_ledgers() -> None:
+    _ledgers.clear()
+
+
+@contextmanager
+def expect_newest_signatures(
+    newest_signatures: Dict[str, Optional[str]],
+) -> Iterator[SignatureCheck]:
+    check: SignatureCheck = SignatureCheck(newest_signatures)
+    token = _signature_check.set(check)
+    try:
+        yield check
+    finally:
+        _signature_check.reset(token)
+
+
+async def get_wallet_ledger(wallet_address: str, window: int) -> WalletLedger:
+    key: Tuple[str, int] = (wallet_address, window)
+    check: Optional[SignatureCheck] = _signature_check.get()
+    ledger: Optional[WalletLedger] = _ledgers.get(key)
+    if (
+        ledger is not None
+        and ledger.is_fresh(settings.ledger_ttl)
+        # A fresh ledger that hasn't seen a signature the caller already knows of
+        # is behind, whatever its age.
+        and (check is None or check.matches(ledger))
+    ):
+        metrics.record_cache_lookup("ledger", True)
+        _ledgers.move_to_end(key)
+        return ledger
+    metrics.record_cache_lookup("ledger", False)
+
+    async def sync() -> Tuple[WalletLedger, Dict[str, float]]:
+        # The flight's task inherits whichever caller started it, so it collects its
+        # own stages and every caller that waited on it gets a copy.
+        with collect_timings() as timings:
+            synced: WalletLedger = await _sync_wallet_ledger(
+                wallet_address, window, ledger
+            )
+        return synced, timings
+
+    with span("ledger_wait"):
+        synced, timings = await _ledger_syncs.do(key, sync)
+    for stage, seconds in timings.items():
+        add_timing(stage, seconds)
+    if check is not None and not check.matches(synced):
+        check.consistent = False
+    return synced
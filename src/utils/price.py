@@ -0,0 +1,116 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable
+from collections.abc import Callable
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import lib.metrics as metrics
+
+FetchPrices = Callable[[List[str]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class PriceService:
+    def __init__(
+        self,
+        fetch_prices: FetchPrices,
+        ttl: float,
+        max_entries: int,
+        batch_size: int = 100,
+        flush_interval: float = 0.005,
+        stale_ttl: float = 0.0,
+    ) -> None:
+        self.fetch_prices = fetch_prices
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future[Any]] = {}
+        self._pending: List[str] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    def cached_price(self, mint: str) -> Tuple[bool, Any]:
+        cached: Optional[Tuple[float, Any]] = self._cache.get(mint)
+        if cached is None or time.monotonic() - cached[0] >= self.ttl:
+            return False, None
+        self._cache.move_to_end(mint)
+        return True, cached[1]
+
+    def stale_price(self, mint: str) -> Any:
+        cached: Optional[Tuple[float, Any]] = self._cache.get(mint)
+        if cached is None or time.monotonic() - cached[0] >= self.stale_ttl:
+            return None
+        return cached[1]
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    async def get_price(self, mint: str) -> Any:
+        hit, price = self.cached_price(mint)
+        metrics.record_cache_lookup("price", hit)
+        if hit:
+            return price
+        future: Optional[asyncio.Future[Any]] = self._in_flight.get(mint)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._in_flight[mint] = future
+            self._pending.append(mint)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.flush_interval, self.flush)
+        return await asyncio.shield(future)
+
+    async def get_prices(self, mints: List[str]) -> Dict[str, Any]:
+        prices: List[Any] = await asyncio.gather(
+            *(self.get_price(mint) for mint in mints)
+        )
+        return dict(zip(mints, prices))
+
+    def flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        while self._pending:
+            batch: List[str] = self._pending[: self.batch_size]
+            self._pending = self._pending[self.batch_size :]
+            task = asyncio.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, mints: List[str]) -> None:
+        prices: Optional[Dict[str, Any]]
+        try:
+            prices = await self.fetch_prices(mints)
+        except asyncio.CancelledError:
+            for mint in mints:
+                self._in_flight.pop(mint).cancel()
+            raise
+        except Exception:
+            prices = None
+
+        fetched_at: float = time.monotonic()
+        for mint in mints:
+            price: Any = None
+            # A failed lookup is not cached, so the next caller tries again.
+            if prices is not None:
+                price = prices.get(mint)
+                self._cache[mint] = (fetched_at, price)
+                self._cache.move_to_end(mint)
+            else:
+                # Better an older price than none while the provider is down.
+                price = self.stale_price(mint)
+            future: asyncio.Future[Any] = self._in_flight.pop(mint)
+            if not future.done():
+                future.set_result(price)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Deque
+from typing import Dict
+from typing import Optional
+
+from settings import settings
+
+# Only shrink the window once per interval, so a burst of 429s from requests that
+# were already in flight counts as a single overload signal.
+DECREASE_COOLDOWN: float = 1.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now: float = time.monotonic()
+                self.tokens = min(
+                    self.burst, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        decrease_factor: float = 0.5,
+    ) -> None:
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future[None]] = deque()
+        self._decreased_at: float = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we got cancelled; pass it on.
+                self.in_flight -= 1
+                self._wake()
+            elif future in self._waiters:
+                self._waiters.remove(future)
+            raise
+
+    def release(self, success: bool = True, overloaded: bool = False) -> None:
+        self.in_flight -= 1
+        if overloaded:
+            now: float = time.monotonic()
+            if now - self._decreased_at >= DECREASE_COOLDOWN:
+                self._decreased_at = now
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        elif success:
+            # Additive increase: roughly +1 slot per window of successful requests.
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            future: asyncio.Future[None] = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+
+class EndpointLimiter:
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int,
+        requests_per_second: float,
+    ) -> None:
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            max_concurrency, min_concurrency, max_concurrency
+        )
+        self.bucket = TokenBucket(requests_per_second, requests_per_second)
+        self.paused_until: float = 0.0
+
+    async def acquire(self) -> None:
+        pause: float = self.paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        await self.bucket.acquire()
+        await self.concurrency.acquire()
+
+    def release(
+        self,
+        success: bool = True,
+        overloaded: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        self.concurrency.release(success, overloaded)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "concurrency_limit": int(self.concurrency.limit),
+            "in_flight": self.concurrency.in_flight,
+            "queue_depth": self.concurrency.queue_depth,
+            "requests_per_second": self.bucket.rate,
+            "paused_for": max(0.0, self.paused_until - time.monotonic()),
+        }
+
+
+_limiters: Dict[str, EndpointLimiter] = {}
+
+
+def get_limiter(
+    endpoint: str,
+    max_concurrency: Optional[int] = None,
+    requests_per_second: Optional[float] = None,
+) -> EndpointLimiter:
+    limiter: Optional[EndpointLimiter] = _limiters.get(endpoint)
+    if limiter is None:
+        max_limit: int = max_concurrency or settings.rpc_max_concurrency
+        if requests_per_second is None:
+            requests_per_second = settings.rpc_requests_per_second
+        limiter = EndpointLimiter(
+            max_limit,
+            min(settings.rpc_min_concurrency, max_limit),
+            requests_per_second,
+        )
+        _limiters[endpoint] = limiter
+    return limiter
+
+
+def get_limiter_snapshots() -> Dict[str, Dict[str, float]]:
+    return {endpoint: limiter.snapshot() for endpoint, limiter in _limiters.items()}
@@ -0,0 +1,73 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from settings import settings
+
+ResultKey = Tuple[str, str, int]
+
+
+class CachedResult(NamedTuple):
+    created_at: float
+    text: str
+    # Newest signature of each wallet the result was computed from.
+    newest_signatures: Dict[str, Optional[str]]
+
+
+class ToolResultCache:
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes: int = 0
+        self._entries: "OrderedDict[ResultKey, CachedResult]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(name: str, arguments: Dict[str, Any], window: int) -> ResultKey:
+        return name, json.dumps(arguments, sort_keys=True), window
+
+    def get(self, key: ResultKey) -> Optional[CachedResult]:
+        entry: Optional[CachedResult] = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.created_at >= self.ttl:
+            self.discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(
+        self, key: ResultKey, text: str, newest_signatures: Dict[str, Optional[str]]
+    ) -> None:
+        if len(text) > self.max_bytes:
+            return
+        self.discard(key)
+        self._entries[key] = CachedResult(time.monotonic(), text, newest_signatures)
+        self.size_bytes += len(text)
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= len(evicted.text)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def discard(self, key: ResultKey) -> None:
+        entry: Optional[CachedResult] = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= len(entry.text)
+
+
+result_cache: ToolResultCache = ToolResultCache(
+    settings.result_cache_ttl,
+    settings.result_cache_max_entries,
+    settings.result_cache_max_bytes,
+)
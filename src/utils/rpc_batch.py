@@ -0,0 +1,87 @@
+import asyncio
+import itertools
+from collections.abc import Awaitable
+from collections.abc import Callable
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+SendBatch = Callable[[List[Dict[str, Any]]], Awaitable[Any]]
+
+
+class RpcBatcher:
+    def __init__(
+        self, send_batch: SendBatch, batch_size: int, flush_interval: float
+    ) -> None:
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._ids = itertools.count(1)
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future[Any]]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    async def request(self, method: str, params: Optional[List[Any]] = None) -> Any:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Any] = loop.create_future()
+        payload: Dict[str, Any] = {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": method,
+            "params": params or [],
+        }
+        self._pending.append((payload, future))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_interval, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(
+        self, batch: List[Tuple[Dict[str, Any], asyncio.Future[Any]]]
+    ) -> None:
+        try:
+            responses: Any = await self.send_batch([payload for payload, _ in batch])
+            if not isinstance(responses, list):
+                raise ValueError(f"Batch request returned {type(responses).__name__}")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        responses_by_id: Dict[Any, Dict[str, Any]] = {
+            response.get("id"): response
+            for response in responses
+            if isinstance(response, dict)
+        }
+        for payload, future in batch:
+            if future.done():
+                continue
+            response: Optional[Dict[str, Any]] = responses_by_id.get(payload["id"])
+            if response is None:
+                future.set_exception(
+                    ValueError(f"Missing batch response for {payload['method']}")
+                )
+            elif response.get("error") is not None:
+                future.set_exception(
+                    ValueError(
+                        f"RPC error for {payload['method']}: {response['error']}"
+                    )
+                )
+            else:
+                future.set_result(response.get("result"))
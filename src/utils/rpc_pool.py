@@ -0,0 +1,172 @@
+import random
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+
+from settings import RpcEndpoint
+from settings import settings
+from utils.circuit_breaker import CircuitBreaker
+from utils.circuit_breaker import get_breaker
+from utils.rate_limit import EndpointLimiter
+from utils.rate_limit import get_limiter
+
+EWMA_ALPHA: float = 0.2
+# An endpoint failing every call scores as if it were this many times slower.
+ERROR_PENALTY: float = 10.0
+MAX_EJECTION_TIME: float = 120.0
+# Share of its weight an endpoint gets back right after re-admission.
+READMIT_START_WEIGHT: float = 0.1
+
+
+class MethodStats:
+    def __init__(self) -> None:
+        self.latency: Optional[float] = None
+        self.error_rate: float = 0.0
+
+    def record(self, latency: float, success: bool) -> None:
+        if success:
+            self.latency = (
+                latency
+                if self.latency is None
+                else self.latency + EWMA_ALPHA * (latency - self.latency)
+            )
+        self.error_rate += EWMA_ALPHA * ((0.0 if success else 1.0) - self.error_rate)
+
+
+class PooledEndpoint:
+    def __init__(self, config: RpcEndpoint) -> None:
+        self.url = config.url
+        self.weight = config.weight
+        self.methods: Optional[Set[str]] = (
+            set(config.methods) if config.methods is not None else None
+        )
+        self.limiter: EndpointLimiter = get_limiter(
+            config.url, config.max_concurrency, config.requests_per_second
+        )
+        self.breaker: CircuitBreaker = get_breaker(config.url)
+        self.stats: Dict[str, MethodStats] = {}
+        self.consecutive_failures: int = 0
+        self.ejections: int = 0
+        self.ejected_until: float = 0.0
+
+    def serves(self, method: str) -> bool:
+        return self.methods is None or method in self.methods
+
+    def is_ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def effective_weight(self, now: float) -> float:
+        # Ramp traffic back up over the re-admission period instead of all at once.
+        if not self.ejections or settings.rpc_readmit_period <= 0:
+            return self.weight
+        progress: float = (now - self.ejected_until) / settings.rpc_readmit_period
+        if progress >= 1:
+            return self.weight
+        return self.weight * (
+            READMIT_START_WEIGHT + (1 - READMIT_START_WEIGHT) * max(progress, 0.0)
+        )
+
+    def score(self, method: str, now: float) -> float:
+        stats: Optional[MethodStats] = self.stats.get(method)
+        if stats is None:
+            # Unmeasured endpoints look fast, so each one gets probed early.
+            return 0.0
+        if stats.latency is None:
+            # Nothing but failures so far.
+            return float("inf")
+        return (
+            stats.latency
+            * (self.limiter.concurrency.in_flight + 1)
+            * (1 + ERROR_PENALTY * stats.error_rate)
+            / max(self.effective_weight(now), 1e-9)
+        )
+
+    def record(self, method: str, latency: float, success: bool, now: float) -> None:
+        self.stats.setdefault(method, MethodStats()).record(latency, success)
+        if success:
+            self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= settings.rpc_eject_after_failures:
+            ejection_time: float = min(
+                MAX_EJECTION_TIME, settings.rpc_ejection_time * 2**self.ejections
+            )
+            self.ejections += 1
+            self.ejected_until = now + ejection_time
+            self.consecutive_failures = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        now: float = time.monotonic()
+        return {
+            "weight": self.effective_weight(now),
+            "ejected": self.is_ejected(now),
+            "latency": {method: stats.latency for method, stats in self.stats.items()},
+            "error_rate": {
+                method: stats.error_rate for method, stats in self.stats.items()
+            },
+        }
+
+
+class RpcPool:
+    def __init__(self, endpoints: List[RpcEndpoint]) -> None:
+        if not endpoints:
+            raise ValueError("RPC pool needs at least one endpoint")
+        self.endpoints: List[PooledEndpoint] = [
+            PooledEndpoint(config) for config in endpoints
+        ]
+
+    def pick(
+        self, method: str, exclude: Optional[PooledEndpoint] = None
+    ) -> PooledEndpoint:
+        now: float = time.monotonic()
+        candidates: List[PooledEndpoint] = [
+            endpoint for endpoint in self.endpoints if endpoint.serves(method)
+        ] or self.endpoints
+        if exclude is not None and len(candidates) > 1:
+            # Hedges go to a different endpoint whenever there is one.
+            candidates = [
+                endpoint for endpoint in candidates if endpoint is not exclude
+            ]
+        healthy: List[PooledEndpoint] = [
+            endpoint
+            for endpoint in candidates
+            if not endpoint.is_ejected(now) and endpoint.breaker.allows_call()
+        ]
+        if not healthy:
+            # Everything is ejected or open: use whichever comes back first, not
+            # nothing; an open circuit then fails the call fast.
+            return min(candidates, key=lambda endpoint: endpoint.ejected_until)
+        if len(healthy) == 1:
+            return healthy[0]
+        # Power of two choices: sample two by weight and keep the better score.
+        weights: List[float] = [endpoint.effective_weight(now) for endpoint in healthy]
+        first, second = random.choices(healthy, weights, k=2)
+        if first is second:
+            return first
+        return min(first, second, key=lambda endpoint: endpoint.score(method, now))
+
+    def record(
+        self, endpoint: PooledEndpoint, method: str, latency: float, success: bool
+    ) -> None:
+        endpoint.record(method, latency, success, time.monotonic())
+
+    def all_circuits_open(self) -> bool:
+        return all(endpoint.breaker.is_open() for endpoint in self.endpoints)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint.url: endpoint.snapshot() for endpoint in self.endpoints}
+
+
+_rpc_pool: Optional[RpcPool] = None
+
+
+def get_rpc_pool() -> RpcPool:
+    global _rpc_pool
+    if _rpc_pool is None:
+        _rpc_pool = RpcPool(
+            settings.rpc_endpoints or [RpcEndpoint(url=settings.solana_rpc)]
+        )
+    return _rpc_pool
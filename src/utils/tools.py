@@ -1,57 +1,174 @@
 import asyncio
+import time
+from collections.abc import AsyncIterator
 from typing import Any
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Set
 from typing import Tuple
+from typing import Union
+from weakref import WeakKeyDictionary
 
 import aiohttp
 import lib.log as logger
+import lib.metrics as metrics
+from decorator import RateLimitError  # type: ignore
 from decorator import retry_error  # type: ignore
+from decorator import UpstreamUnavailableError  # type: ignore
+from lib.metrics import endpoint_label
+from lib.timing import span
 from settings import settings
 from solders.pubkey import Pubkey
+from utils.circuit_breaker import get_breaker
+from utils.clients import get_http_session
+from utils.decoder import decode_base64_transaction
+from utils.decoder import decode_trade
+from utils.decoder import TradeEvent
+from utils.hedging import hedged
+from utils.hedging import rpc_hedger
+from utils.price import PriceService
+from utils.rate_limit import EndpointLimiter
+from utils.rate_limit import parse_retry_after
+from utils.rpc_batch import RpcBatcher
+from utils.rpc_pool import get_rpc_pool
+from utils.rpc_pool import PooledEndpoint
+from utils.rpc_pool import RpcPool
+from utils.tx_cache import get_transaction_cache
 
 REQUEST_MAX_TIMEOUT: int = 10
 MINT_SOL: Pubkey = settings.mint_sol
 SOL_DECIMALS: int = settings.sol_decimals
 TOKEN_DECIMALS: int = settings.token_decimals
-SOLANA_RPC = settings.solana_rpc
 TRANSACTION_NUMBER_LIMIT_HISTORY = 1000
-PROCESS_TRANSACTION_SEMAPHORE = 100
-semaphore = asyncio.Semaphore(PROCESS_TRANSACTION_SEMAPHORE)
+PROCESS_TRANSACTION_WORKERS = 100
 TRANSACTION_STATUS = "finalized"
-JUP_URL: str = "https://api.jup.ag/price/v2"
+RATE_LIMITED_STATUSES: Tuple[int, ...] = (429, 503)
+JUP_URL: str = settings.jupiter_price_url
+JUP_MAX_IDS: int = 100
+USDC_MINT: str = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+_PIPELINE_DONE: object = object()
+_rpc_batchers: "WeakKeyDictionary[aiohttp.ClientSession, RpcBatcher]" = (
+    WeakKeyDictionary()
+)
 
 
-def find_index(
-    value_list: List[str], *values: str
-) -> Tuple[Tuple[str, Optional[int]], ...]:
-    result: List[Tuple[str, Optional[int]]] = []
-    for value in values:
-        try:
-            index: int = value_list.index(value)
-            result.append((value, index))
-        except ValueError:
-            result.append((value, None))
-    return tuple(result)
+class TransactionFetchError(ValueError):
+    pass
 
 
-def check_indices_in_range(
-    indices: Tuple[Tuple[str, Optional[int]], ...], valid_indices: List[int]
-) -> Optional[str]:
-    index1: Optional[int] = indices[0][1]
-    index2: Optional[int] = indices[1][1]
+def rate_limit_error(
+    message: str, status: int, retry_after: Optional[float]
+) -> RateLimitError:
+    # A 503 is still honoured like a rate limit, but it also means the upstream is
+    # down, so circuit breakers count it as a failure.
+    if status == 503:
+        return UpstreamUnavailableError(message, retry_after)
+    return RateLimitError(message, retry_after)
 
-    in_index1: bool = index1 in valid_indices if index1 is not None else False
-    in_index2: bool = index2 in valid_indices if index2 is not None else False
 
-    if in_index1 == in_index2:
-        return None
-    elif in_index1:
-        return indices[0][0]
-    elif in_index2:
-        return indices[1][0]
-    return None
+async def post_rpc_payload(
+    session: aiohttp.ClientSession,
+    payload: Union[Dict[str, Any], List[Dict[str, Any]]],
+    timeout: int = REQUEST_MAX_TIMEOUT,
+    endpoint: Optional[PooledEndpoint] = None,
+) -> Any:
+    headers: Dict[str, str] = {
+        "Content-Type": "application/json",
+    }
+
+    method: str = payload["method"] if isinstance(payload, dict) else "batch"
+    # Batches only ever hold one method, so route them like a single call of it.
+    route_method: str = method if isinstance(payload, dict) else payload[0]["method"]
+    pool: RpcPool = get_rpc_pool()
+    if endpoint is None:
+        endpoint = pool.pick(route_method)
+    limiter: EndpointLimiter = endpoint.limiter
+    # Checked before taking a limiter slot, so an outage holds no slots or sockets.
+    with endpoint.breaker.guard():
+        await limiter.acquire()
+        success: bool = False
+        overloaded: bool = False
+        cancelled: bool = False
+        retry_after: Optional[float] = None
+        status: str = "error"
+        started_at: float = time.perf_counter()
+        try:
+            async with session.post(
+                endpoint.url, json=payload, headers=headers, timeout=timeout
+            ) as response:
+                status = str(response.status)
+                if response.status in RATE_LIMITED_STATUSES:
+                    overloaded = True
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    raise rate_limit_error(
+                        f"RPC request rate limited with status {response.status}",
+                        response.status,
+                        retry_after,
+                    )
+
+                if response.status != 200:
+                    error_text: str = await response.text()
+                    logger.warning(
+                        f"RPC request failed with status {response.status}: {error_text}"
+                    )
+                    raise ValueError(f"RPC request failed: {error_text}")
+
+                content_type: Optional[str] = response.headers.get("Content-Type", "")
+                if content_type and "application/json" not in content_type:
+                    error_text = await response.text()
+                    logger.warning(
+                        f"Unexpected content type: {content_type}, response: {error_text}"
+                    )
+                    raise ValueError(f"Unexpected content type: {content_type}")
+
+                response_json: Any = await response.json()
+                success = True
+                return response_json
+        except asyncio.TimeoutError:
+            overloaded = True
+            status = "timeout"
+            raise
+        except asyncio.CancelledError:
+            # The other copy of a hedged call won; this says nothing about the endpoint.
+            cancelled = True
+            status = "cancelled"
+            raise
+        finally:
+            latency: float = time.perf_counter() - started_at
+            metrics.RPC_LATENCY.labels(
+                endpoint_label(endpoint.url), method, status
+            ).observe(latency)
+            if not cancelled:
+                pool.record(endpoint, route_method, latency, success)
+            if success:
+                rpc_hedger.observe(method, latency)
+            limiter.release(success, overloaded, retry_after)
+
+
+async def post_hedged_rpc_payload(
+    session: aiohttp.ClientSession,
+    payload: Dict[str, Any],
+    timeout: int = REQUEST_MAX_TIMEOUT,
+) -> Any:
+    method: str = payload["method"]
+    delay: Optional[float] = rpc_hedger.delay(method)
+    if delay is None:
+        return await post_rpc_payload(session, payload, timeout)
+
+    pool: RpcPool = get_rpc_pool()
+    primary: PooledEndpoint = pool.pick(method)
+    response_json, hedge_won = await hedged(
+        lambda: post_rpc_payload(session, payload, timeout, primary),
+        lambda: post_rpc_payload(
+            session, payload, timeout, pool.pick(method, exclude=primary)
+        ),
+        delay,
+        rpc_hedger.try_spend,
+    )
+    if hedge_won is not None:
+        metrics.RPC_HEDGES.labels(method, "hedge" if hedge_won else "primary").inc()
+    return response_json
 
 
 @retry_error(max_retries=10, retry_delay=1)
@@ -67,49 +184,71 @@ async def send_rpc_request(
         "method": method,
         "params": params or [],
     }
-    headers: Dict[str, str] = {
-        "Content-Type": "application/json",
-    }
 
-    async with session.post(
-        SOLANA_RPC, json=payload, headers=headers, timeout=timeout
-    ) as response:
-        if response.status != 200:
-            error_text: str = await response.text()
-            logger.warning(
-                f"RPC request failed with status {response.status}: {error_text}"
-            )
-            raise ValueError(f"RPC request failed: {error_text}")
+    response_json: Optional[Dict[str, Any]] = await post_hedged_rpc_payload(
+        session, payload, timeout
+    )
+    if response_json is None:
+        logger.warning(
+            f"Received empty response for method: {method}, params: {params}"
+        )
+        raise ValueError(f"Empty response received for {method}")
 
-        content_type: Optional[str] = response.headers.get("Content-Type", "")
-        if content_type and "application/json" not in content_type:
-            error_text = await response.text()
-            logger.warning(
-                f"Unexpected content type: {content_type}, response: {error_text}"
-            )
-            raise ValueError(f"Unexpected content type: {content_type}")
+    return response_json.get("result")
 
-        response_json: Dict[str, Any] = await response.json()
-        if response_json is None:
-            logger.warning(
-                f"Received empty response for method: {method}, params: {params}"
-            )
-            raise ValueError(f"Empty response received for {method}")
 
-        return response_json.get("result")
+def get_rpc_batcher(session: aiohttp.ClientSession) -> RpcBatcher:
+    batcher: Optional[RpcBatcher] = _rpc_batchers.get(session)
+    if batcher is None:
+        batcher = RpcBatcher(
+            lambda payloads: post_rpc_payload(session, payloads),
+            batch_size=settings.rpc_batch_size,
+            flush_interval=settings.rpc_batch_flush_interval,
+        )
+        _rpc_batchers[session] = batcher
+    return batcher
+
+
+@retry_error(max_retries=10, retry_delay=1)
+async def send_batched_rpc_request(
+    session: aiohttp.ClientSession,
+    method: str,
+    params: Optional[List[Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    return await get_rpc_batcher(session).request(method, params)
 
 
 async def get_transaction_details(
     session: aiohttp.ClientSession, signature: str
 ) -> Optional[Dict[str, Any]]:
-    transaction_details: Optional[Dict[str, Any]] = await send_rpc_request(
-        session,
-        "getTransaction",
-        params=[
-            str(signature),
-            {"encoding": "json", "maxSupportedTransactionVersion": 0},
-        ],
-    )
+    cache = get_transaction_cache()
+    if cache is not None:
+        cached: Optional[Dict[str, Any]] = await cache.get(str(signature))
+        metrics.record_cache_lookup("transaction", cached is not None)
+        if cached is not None:
+            return cached
+
+    params: List[Any] = [
+        str(signature),
+        {
+            "encoding": settings.transaction_encoding,
+            "maxSupportedTransactionVersion": 0,
+        },
+    ]
+    transaction_details: Optional[Dict[str, Any]]
+    if settings.rpc_batch_size > 1:
+        transaction_details = await send_batched_rpc_request(
+            session, "getTransaction", params
+        )
+    else:
+        transaction_details = await send_rpc_request(
+            session, "getTransaction", params=params
+        )
+    if transaction_details is not None and settings.transaction_encoding == "base64":
+        transaction_details = decode_base64_transaction(transaction_details)
+    # getTransaction defaults to the finalized commitment, so the result is immutable.
+    if cache is not None and transaction_details is not None:
+        await cache.put(str(signature), transaction_details)
     return transaction_details
 
 
@@ -119,6 +258,7 @@ async def get_transaction_history(
     limit: int = 100,
     commitment=TRANSACTION_STATUS,
     before: Optional[str] = None,
+    until: Optional[str] = None,
 ) -> Optional[List[Dict[str, Any]]]:
     params: List[Any] = [
         str(wallet_address),
@@ -131,96 +271,74 @@ async def get_transaction_history(
     ]
     if before:
         params[1]["before"] = before
+    if until:
+        params[1]["until"] = until
 
     result = await send_rpc_request(session, "getSignaturesForAddress", params)
     return result
 
 
-def is_trade_mint(
-    data: Dict[str, Any],
-    dev_id: str,
-) -> bool:
-    meta: Dict[str, Any] = data["meta"]
-    pre_token_balances: List[Dict[str, Any]] = meta.get("preTokenBalances", [])
-    post_token_balances: List[Dict[str, Any]] = meta.get("postTokenBalances", [])
-
-    pre_balances_by_account_index: Dict[int, Dict[str, Any]] = {
-        balance["accountIndex"]: balance for balance in pre_token_balances
-    }
-
-    found_dev_owner: bool = False
-    for post_balance in post_token_balances:
-        account_index: int = post_balance["accountIndex"]
-        pre_balance: Optional[Dict[str, Any]] = pre_balances_by_account_index.get(
-            account_index
+async def get_latest_signatures(
+    session: aiohttp.ClientSession, wallet_addresses: List[str]
+) -> Dict[str, Optional[str]]:
+    histories: List[Optional[List[Dict[str, Any]]]] = await asyncio.gather(
+        *(
+            get_transaction_history(session, wallet_address, limit=1)
+            for wallet_address in wallet_addresses
         )
-
-        if pre_token_balances:
-            if pre_balance and post_balance["owner"] == dev_id:
-                found_dev_owner = True
-                if (
-                    int(post_balance["uiTokenAmount"]["amount"])
-                    - int(pre_balance["uiTokenAmount"]["amount"])
-                ) != 0:
-                    return True
-        else:
-            if post_balance["owner"] == dev_id:
-                found_dev_owner = True
-                if int(post_balance["uiTokenAmount"]["amount"]) != 0:
-                    return True
-
-    if not found_dev_owner:
-        for post_balance in post_token_balances:
-            account_index = post_balance["accountIndex"]
-            pre_balance = pre_balances_by_account_index.get(account_index)
-
-            if pre_token_balances:
-                if pre_balance and post_balance["mint"] != str(MINT_SOL):
-                    if (
-                        int(post_balance["uiTokenAmount"]["amount"])
-                        - int(pre_balance["uiTokenAmount"]["amount"])
-                    ) != 0:
-                        return True
-            else:
-                if post_balance["mint"] != str(MINT_SOL):
-                    if int(post_balance["uiTokenAmount"]["amount"]) != 0:
-                        return True
-    return False
-
-
-def find_mint(
-    post_token_balances: List[Dict[str, Any]], account_keys: List[str]
-) -> Optional[str]:
-    for item in post_token_balances:
-        if item["mint"] != str(MINT_SOL):
-            return item["mint"]
-    for key in account_keys:
-        if key.endswith("pump"):
-            return key
-    return None
+    )
+    latest_signatures: Dict[str, Optional[str]] = {}
+    for wallet_address, history in zip(wallet_addresses, histories):
+        if history is None:
+            # Unknown rather than "no activity", so callers never trust it.
+            raise ValueError(f"Can not get latest signature of {wallet_address}")
+        latest_signatures[wallet_address] = history[0]["signature"] if history else None
+    return latest_signatures
 
 
 @retry_error(max_retries=5, retry_delay=1)
-async def fetch_price_from_api(
-    session: aiohttp.ClientSession, url: str, params: Dict[str, str]
-) -> Optional[float]:
-    async with session.get(url, params=params) as response:
-        if response.status == 200:
+async def fetch_prices_from_api(
+    session: aiohttp.ClientSession, url: str, mint_addresses: List[str]
+) -> Optional[Dict[str, Any]]:
+    params: Dict[str, str] = {
+        "ids": ",".join(mint_addresses),
+        "vsToken": USDC_MINT,
+    }
+    with get_breaker(url).guard():
+        async with session.get(url, params=params) as response:
+            if response.status in RATE_LIMITED_STATUSES:
+                raise rate_limit_error(
+                    f"Price request rate limited with status {response.status}",
+                    response.status,
+                    parse_retry_after(response.headers.get("Retry-After")),
+                )
+            if response.status != 200:
+                # Raised inside the guard so Jupiter errors count against its circuit.
+                raise ValueError(f"Price request failed with status {response.status}")
             data: Dict[str, Any] = await response.json()
-            return data["data"].get(params["ids"], {}).get("price")
-        return None
+            return {
+                mint: (data["data"].get(mint) or {}).get("price")
+                for mint in mint_addresses
+            }
+
+
+price_service: PriceService = PriceService(
+    lambda mints: fetch_prices_from_api(get_http_session(), JUP_URL, mints),
+    ttl=settings.price_cache_ttl,
+    max_entries=settings.price_cache_max_entries,
+    batch_size=JUP_MAX_IDS,
+    stale_ttl=settings.price_cache_stale_ttl,
+)
 
 
 async def get_token_price_exchange(mint_address: str) -> Optional[float]:
-    params: Dict[str, str] = {
-        "ids": str(mint_address),
-        "vsToken": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
-    }
-    async with aiohttp.ClientSession() as session:
-        price = await fetch_price_from_api(session, JUP_URL, params)
-        if price is None:
-            return None
-        return price
+    return await price_service.get_price(str(mint_address))
+
+
+async def get_token_prices_exchange(
+    mint_addresses: List[str],
+) -> Dict[str, Optional[float]]:
+    return await price_service.get_prices([str(mint) for mint in mint_addresses])
 
 
 async def get_token_price_bounding_curve(token_data: Dict[str, Any]) -> Optional[float]:
@@ -239,96 +357,150 @@ async def get_token_price_bounding_curve(token_data: Dict[str, Any]) -> Optional
     return current_price_in_sol * float(current_solana_price)
 
 
-async def calculate_sol_amount(
-    meta: Dict[str, Any], account_keys: List[str], dev_id: str
-) -> int:
-    pre_balances: List[int] = meta.get("preBalances", [])
-    post_balances: List[int] = meta.get("postBalances", [])
-    dev_index_list: Tuple[Tuple[str, Optional[int]], ...] = find_index(
-        account_keys, dev_id
-    )
-    dev_index: Optional[int] = dev_index_list[0][1]
-    if dev_index is not None:
-        trade_sol_lamport: int = int(post_balances[dev_index]) - int(
-            pre_balances[dev_index]
-        )
-        return trade_sol_lamport
-    else:
-        return 0
-
-
-async def calculate_sol_amount_without_fee(
-    meta: Dict[str, Any], account_keys: List[str], dev_id: str
-) -> int:
-    pre_balances: List[int] = meta.get("preBalances", [])
-    post_balances: List[int] = meta.get("postBalances", [])
-    fee: int = meta.get("fee", 0)
-    dev_index_list: Tuple[Tuple[str, Optional[int]], ...] = find_index(
-        account_keys, dev_id
-    )
-    dev_index: Optional[int] = dev_index_list[0][1]
-    if dev_index is not None:
-        trade_sol_lamport: int = (
-            int(post_balances[dev_index]) - int(pre_balances[dev_index]) + int(fee)
-        )
-        return trade_sol_lamport
-    else:
-        return 0
-
-
-async def process_transaction(
+async def fetch_trade(
     session: aiohttp.ClientSession,
     item: Dict[str, Any],
     wallet_address: str,
     time_threshold: int,
-) -> Tuple[Optional[str], int]:
-    async with semaphore:
-        signature = item["signature"]
+) -> Optional[TradeEvent]:
+    signature = item["signature"]
+    with span("detail_fetch"):
         transaction_details = await get_transaction_details(session, signature)
-        if transaction_details is None:
-            return None, 0
-
-        block_time = transaction_details.get("blockTime")
-        if block_time and block_time >= time_threshold:
-            is_trade = is_trade_mint(transaction_details, str(wallet_address))
-            if is_trade:
-                meta = transaction_details["meta"]
-                post_token_balances: List[Dict[str, Any]] = meta.get(
-                    "postTokenBalances", []
-                )
-                transaction: Dict[str, Any] = transaction_details["transaction"]
-                account_keys: List[str] = transaction["message"]["accountKeys"]
-                mint = find_mint(post_token_balances, account_keys)
-                trade_sol = await calculate_sol_amount_without_fee(
-                    meta, account_keys, str(wallet_address)
-                )
-                return mint, trade_sol
-        return None, 0
+    if transaction_details is None:
+        raise TransactionFetchError(f"Can not get transaction {signature}")
+
+    block_time = transaction_details.get("blockTime")
+    if block_time and block_time >= time_threshold:
+        with span("classification"):
+            trade: Optional[TradeEvent] = decode_trade(
+                transaction_details, str(wallet_address)
+            )
+        metrics.TRANSACTIONS_CLASSIFIED.labels(
+            "non_trade" if trade is None else "trade"
+        ).inc()
+        cache = get_transaction_cache()
+        if trade is None and cache is not None:
+            await cache.add_non_trade(str(wallet_address), signature)
+        return trade
+    return None
 
 
-async def fetch_transactions_until_threshold(
-    session: aiohttp.ClientSession, wallet_address: str, time_threshold: int
+async def prefilter_signatures(
+    page: List[Dict[str, Any]], wallet_address: str, time_threshold: int
 ) -> List[Dict[str, Any]]:
-    all_transactions: List[Dict[str, Any]] = []
+    # getSignaturesForAddress already tells us enough to skip most useless detail
+    # fetches: failed transactions, ones outside the window and known non-trades.
+    candidates: List[Dict[str, Any]] = [
+        item
+        for item in page
+        if item.get("err") is None and (item.get("blockTime") or 0) >= time_threshold
+    ]
+    cache = get_transaction_cache()
+    if cache is None or not candidates:
+        return candidates
+    non_trades: Set[str] = await cache.known_non_trades(
+        str(wallet_address), [item["signature"] for item in candidates]
+    )
+    metrics.record_cache_lookup("non_trade", True, len(non_trades))
+    metrics.record_cache_lookup("non_trade", False, len(candidates) - len(non_trades))
+    return [item for item in candidates if item["signature"] not in non_trades]
+
+
+async def iter_transaction_pages(
+    session: aiohttp.ClientSession,
+    wallet_address: str,
+    time_threshold: int,
+    until: Optional[str] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
     before: Optional[str] = None
     while True:
-        history = await get_transaction_history(
-            session,
-            wallet_address,
-            limit=TRANSACTION_NUMBER_LIMIT_HISTORY,
-            commitment=TRANSACTION_STATUS,
-            before=before,
-        )
-        if not history:
+        with span("signature_paging"):
+            history = await get_transaction_history(
+                session,
+                wallet_address,
+                limit=TRANSACTION_NUMBER_LIMIT_HISTORY,
+                commitment=TRANSACTION_STATUS,
+                before=before,
+                until=until,
+            )
+        if history is None:
             logger.error(f"Can not get trade history of {wallet_address}")
+            raise ValueError(f"Can not get trade history of {wallet_address}")
+        if not history:
+            # With `until`, or after a full page, an empty page just means there
+            # is nothing more to read.
+            if until is None and before is None:
+                logger.error(f"Can not get trade history of {wallet_address}")
+            break
+        yield history
+        if len(history) < TRANSACTION_NUMBER_LIMIT_HISTORY:
             break
-        all_transactions.extend(history)
         earliest_transaction = history[-1]
         earliest_block_time = earliest_transaction.get("blockTime")
         if earliest_block_time and earliest_block_time < time_threshold:
             break
         before = earliest_transaction["signature"]
-    return all_transactions
+
+
+async def process_transaction_pages(
+    session: aiohttp.ClientSession,
+    pages: AsyncIterator[List[Dict[str, Any]]],
+    wallet_address: str,
+    time_threshold: int,
+    workers: int = PROCESS_TRANSACTION_WORKERS,
+) -> AsyncIterator[Tuple[Dict[str, Any], Optional[TradeEvent], bool]]:
+    # Yields (item, trade, fetched); fetched is False when the details never came.
+    # Details are fetched while later pages are still being paged in; the bounded
+    # queue keeps only a few pages of signatures in memory at once.
+    items: asyncio.Queue[Optional[Dict[str, Any]]] = asyncio.Queue(maxsize=workers * 2)
+    results: asyncio.Queue[Any] = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            async for page in pages:
+                for item in await prefilter_signatures(
+                    page, wallet_address, time_threshold
+                ):
+                    await items.put(item)
+        except Exception as e:
+            results.put_nowait(e)
+        # Not in a finally: once cancelled nobody reads the queue any more, so a put
+        # on a full queue would never return and cleanup would hang.
+        for _ in range(workers):
+            await items.put(None)
+
+    async def work() -> None:
+        try:
+            while (item := await items.get()) is not None:
+                try:
+                    trade = await fetch_trade(
+                        session, item, wallet_address, time_threshold
+                    )
+                except TransactionFetchError:
+                    results.put_nowait((item, None, False))
+                else:
+                    results.put_nowait((item, trade, True))
+        except Exception as e:
+            results.put_nowait(e)
+        finally:
+            results.put_nowait(_PIPELINE_DONE)
+
+    tasks: List[asyncio.Task[None]] = [asyncio.create_task(produce())]
+    tasks.extend(asyncio.create_task(work()) for _ in range(workers))
+    try:
+        finished: int = 0
+        while finished < workers:
+            result: Any = await results.get()
+            if result is _PIPELINE_DONE:
+                finished += 1
+            elif isinstance(result, Exception):
+                raise result
+            else:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 
 def calculate_win_rate_from_profits(token_profits: Dict[str, int]) -> float:
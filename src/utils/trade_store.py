@@ -0,0 +1,117 @@
+from array import array
+from typing import Dict
+from typing import List
+
+import numpy as np
+
+
+def column(values: array) -> np.ndarray:
+    # A zero-copy int64 view; it must be dropped before the array grows again.
+    return np.frombuffer(values, dtype=np.int64)
+
+
+def to_array(values: np.ndarray) -> array:
+    result: array = array("q")
+    result.frombytes(values.astype(np.int64).tobytes())
+    return result
+
+
+class TradeStore:
+    def __init__(self) -> None:
+        self.mints: List[str] = []
+        self.mint_ids: Dict[str, int] = {}
+        self.signatures: List[str] = []
+        self.mint_id: array = array("q")
+        self.block_time: array = array("q")
+        self.slot: array = array("q")
+        self.signature_index: array = array("q")
+        self.lamports: array = array("q")
+        self.fee: array = array("q")
+
+    def __len__(self) -> int:
+        return len(self.lamports)
+
+    def intern_mint(self, mint: str) -> int:
+        mint_id: int | None = self.mint_ids.get(mint)
+        if mint_id is None:
+            mint_id = len(self.mints)
+            self.mint_ids[mint] = mint_id
+            self.mints.append(mint)
+        return mint_id
+
+    def append(
+        self,
+        signature: str,
+        mint: str,
+        block_time: int,
+        slot: int,
+        lamports: int,
+        fee: int,
+    ) -> None:
+        self.mint_id.append(self.intern_mint(mint))
+        self.block_time.append(block_time)
+        self.slot.append(slot)
+        self.signature_index.append(len(self.signatures))
+        self.signatures.append(signature)
+        self.lamports.append(lamports)
+        self.fee.append(fee)
+
+    def extend(self, other: "TradeStore") -> None:
+        # Only the other store's distinct mints go through Python; rows are copied
+        # column by column.
+        remap: np.ndarray = np.array(
+            [self.intern_mint(mint) for mint in other.mints], dtype=np.int64
+        )
+        if len(other):
+            self.mint_id.frombytes(
+                remap[column(other.mint_id)].astype(np.int64).tobytes()
+            )
+            self.signature_index.frombytes(
+                (column(other.signature_index) + len(self.signatures)).tobytes()
+            )
+        self.signatures.extend(other.signatures)
+        self.block_time.extend(other.block_time)
+        self.slot.extend(other.slot)
+        self.lamports.extend(other.lamports)
+        self.fee.extend(other.fee)
+
+    def since(self, block_time: float) -> "TradeStore":
+        # Rebuild rather than delete in place so dropped mints and signatures go too.
+        retained: TradeStore = TradeStore()
+        if not len(self):
+            return retained
+        keep: np.ndarray = column(self.block_time) >= block_time
+        mint_ids: np.ndarray = column(self.mint_id)[keep]
+        used_mints: np.ndarray = np.unique(mint_ids)
+        remap: np.ndarray = np.zeros(len(self.mints), dtype=np.int64)
+        remap[used_mints] = np.arange(len(used_mints))
+        retained.mints = [self.mints[mint_id] for mint_id in used_mints.tolist()]
+        retained.mint_ids = {mint: index for index, mint in enumerate(retained.mints)}
+        retained.signatures = [
+            self.signatures[index]
+            for index in column(self.signature_index)[keep].tolist()
+        ]
+        retained.mint_id = to_array(remap[mint_ids])
+        retained.signature_index = to_array(np.arange(len(retained.signatures)))
+        retained.block_time = to_array(column(self.block_time)[keep])
+        retained.slot = to_array(column(self.slot)[keep])
+        retained.lamports = to_array(column(self.lamports)[keep])
+        retained.fee = to_array(column(self.fee)[keep])
+        return retained
+
+    def traded_mints(self) -> List[str]:
+        return [
+            self.mints[mint_id] for mint_id in np.unique(column(self.mint_id)).tolist()
+        ]
+
+    def lamports_by_mint(self) -> Dict[str, int]:
+        if not len(self):
+            return {}
+        mint_ids: np.ndarray = column(self.mint_id)
+        sums: np.ndarray = np.zeros(len(self.mints), dtype=np.int64)
+        np.add.at(sums, mint_ids, column(self.lamports))
+        traded: np.ndarray = np.bincount(mint_ids, minlength=len(self.mints)) > 0
+        return {
+            self.mints[mint_id]: int(sums[mint_id])
+            for mint_id in np.flatnonzero(traded)
+        }
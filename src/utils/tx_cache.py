@@ -0,0 +1,202 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import TypeVar
+
+from settings import settings
+
+# Evict a little more than strictly needed so we don't run a DELETE on every put.
+EVICTION_SLACK: float = 0.1
+# Stay well under SQLite's limit on bound parameters per statement.
+LOOKUP_CHUNK_SIZE: int = 500
+# Cache hits refresh accessed_at in batches rather than with one write per hit.
+ACCESS_FLUSH_SIZE: int = 256
+
+T = TypeVar("T")
+
+
+class TransactionCache:
+    def __init__(self, path: Path, max_entries: int) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # SQLite, zlib and JSON work all runs here, off the event loop; a single
+        # thread also keeps writes from contending with each other.
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="tx-cache"
+        )
+        self._touched: List[str] = []
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transactions ("
+            "signature TEXT PRIMARY KEY, "
+            "data BLOB NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS transactions_accessed_at "
+            "ON transactions(accessed_at)"
+        )
+        # Signatures already classified as non-trades for a wallet.
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS non_trades ("
+            "wallet TEXT NOT NULL, "
+            "signature TEXT NOT NULL, "
+            "added_at REAL NOT NULL, "
+            "PRIMARY KEY (wallet, signature)) WITHOUT ROWID"
+        )
+        self._size: int = self._conn.execute(
+            "SELECT COUNT(*) FROM transactions"
+        ).fetchone()[0]
+        self._non_trades_size: int = self._conn.execute(
+            "SELECT COUNT(*) FROM non_trades"
+        ).fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, func, *args
+        )
+
+    async def get(self, signature: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._get, signature)
+
+    async def put(self, signature: str, transaction: Dict[str, Any]) -> None:
+        await self._run(self._put, signature, transaction)
+
+    async def known_non_trades(self, wallet: str, signatures: List[str]) -> Set[str]:
+        return await self._run(self._known_non_trades, wallet, signatures)
+
+    async def add_non_trade(self, wallet: str, signature: str) -> None:
+        await self._run(self._add_non_trade, wallet, signature)
+
+    def _get(self, signature: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM transactions WHERE signature = ?", (signature,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched.append(signature)
+            if len(self._touched) >= ACCESS_FLUSH_SIZE:
+                self._flush_touched()
+        return json.loads(zlib.decompress(row[0]))
+
+    def _flush_touched(self) -> None:
+        if not self._touched:
+            return
+        accessed_at: float = time.time()
+        self._conn.executemany(
+            "UPDATE transactions SET accessed_at = ? WHERE signature = ?",
+            [(accessed_at, signature) for signature in self._touched],
+        )
+        self._touched = []
+
+    def _put(self, signature: str, transaction: Dict[str, Any]) -> None:
+        data: bytes = zlib.compress(
+            json.dumps(transaction, separators=(",", ":")).encode("utf-8")
+        )
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO transactions (signature, data, accessed_at) "
+                "VALUES (?, ?, ?)",
+                (signature, data, time.time()),
+            )
+            self._size += cursor.rowcount
+            if self._size > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Pending hits must count, or recently read rows would be evicted first.
+        self._flush_touched()
+        target: int = int(self.max_entries * (1 - EVICTION_SLACK))
+        cursor = self._conn.execute(
+            "DELETE FROM transactions WHERE signature IN ("
+            "SELECT signature FROM transactions ORDER BY accessed_at LIMIT ?)",
+            (self._size - target,),
+        )
+        self._size -= cursor.rowcount
+
+    def _known_non_trades(self, wallet: str, signatures: List[str]) -> Set[str]:
+        known: Set[str] = set()
+        with self._lock:
+            for i in range(0, len(signatures), LOOKUP_CHUNK_SIZE):
+                chunk: List[str] = signatures[i : i + LOOKUP_CHUNK_SIZE]
+                rows = self._conn.execute(
+                    "SELECT signature FROM non_trades WHERE wallet = ? "
+                    f"AND signature IN ({','.join('?' * len(chunk))})",
+                    (wallet, *chunk),
+                ).fetchall()
+                known.update(row[0] for row in rows)
+        return known
+
+    def _add_non_trade(self, wallet: str, signature: str) -> None:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO non_trades (wallet, signature, added_at) "
+                "VALUES (?, ?, ?)",
+                (wallet, signature, time.time()),
+            )
+            self._non_trades_size += cursor.rowcount
+            if self._non_trades_size > self.max_entries:
+                target: int = int(self.max_entries * (1 - EVICTION_SLACK))
+                cursor = self._conn.execute(
+                    "DELETE FROM non_trades WHERE (wallet, signature) IN ("
+                    "SELECT wallet, signature FROM non_trades "
+                    "ORDER BY added_at LIMIT ?)",
+                    (self._non_trades_size - target,),
+                )
+                self._non_trades_size -= cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM transactions")
+            self._conn.execute("DELETE FROM non_trades")
+            self._size = 0
+            self._non_trades_size = 0
+            self._touched = []
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._flush_touched()
+            self._conn.close()
+
+
+_transaction_cache: Optional[TransactionCache] = None
+
+
+def get_transaction_cache() -> Optional[TransactionCache]:
+    global _transaction_cache
+    if settings.tx_cache_max_entries <= 0:
+        return None
+    if _transaction_cache is None:
+        _transaction_cache = TransactionCache(
+            settings.tx_cache_path, settings.tx_cache_max_entries
+        )
+    return _transaction_cache
+
+
+def close_transaction_cache() -> None:
+    global _transaction_cache
+    if _transaction_cache is not None:
+        _transaction_cache.close()
+        _transaction_cache = None